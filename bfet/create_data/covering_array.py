@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from itertools import combinations, product
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from .data_factory import DataFactory, get_rng
+
+Constraint = Callable[[Dict[str, Any]], bool]
+Row = List[Optional[int]]
+Interaction = Tuple[Tuple[int, int], ...]
+
+
+def create_covering_array(
+    data: Mapping[str, Iterable[Any]],
+    strength: int = 2,
+    constraints: Optional[List[Constraint]] = None,
+    factory: Optional[DataFactory] = None,
+) -> List[Tuple[Any, ...]]:
+    """Create a few cases that together contain every combination of values of any strength
+    parameters, instead of every possible case like create_possibilities. With strength=2
+    (pairwise), every pair of values of any two parameters is in at least one case. The cases
+    are built with the IPOG algorithm, adding one parameter at a time.
+
+    Parameters
+    ----------
+        data : Mapping[str, Iterable[Any]]
+            The possible values of each parameter
+
+        strength : int
+            The number of parameters whose combinations of values are all covered, by default 2
+
+        constraints : Optional[List[Constraint]]
+            Functions that take a case, as a dict of the parameters with a value so far, and
+            return False if it isn't allowed. They are also called with incomplete cases, so
+            they should use case.get. The combinations they forbid aren't covered,
+            by default None
+
+        factory : Optional[DataFactory]
+            Used to break ties and to fill the values that don't matter. Pass a seeded one to
+            get the same cases on every run, by default None
+
+    Returns
+    -------
+        List[Tuple[Any, ...]]
+            The cases, with the values in the order of the keys of data, like the ones of
+            create_possibilities
+    """
+    if strength < 1:
+        raise ValueError("The strength should be >= 1")
+    builder = _CoveringArrayBuilder(data, strength, constraints or [], get_rng(factory))
+    return builder.build()
+
+
+class _CoveringArrayBuilder:
+    def __init__(
+        self,
+        data: Mapping[str, Iterable[Any]],
+        strength: int,
+        constraints: List[Constraint],
+        rng: np.random.Generator,
+    ) -> None:
+        self.names = list(data)
+        self.values = [tuple(values) for values in data.values()]
+        if not all(self.values):
+            raise ValueError("Every parameter needs at least one value")
+        self.strength = min(strength, len(self.names))
+        self.constraints = constraints
+        self.rng = rng
+        # Adding the parameters with more values first gives fewer cases
+        self.order = sorted(range(len(self.names)), key=lambda p: -len(self.values[p]))
+        self.rows: List[Row] = []
+        self.extendable: Dict[Tuple[Optional[int], ...], bool] = {}
+
+    def build(self) -> List[Tuple[Any, ...]]:
+        first = self.order[: self.strength]
+        for value_indexes in product(*(range(len(self.values[p])) for p in first)):
+            row = self._row(zip(first, value_indexes))
+            if self._extendable(row):
+                self.rows.append(row)
+        for position in range(self.strength, len(self.order)):
+            previous, parameter = sorted(self.order[:position]), self.order[position]
+            uncovered = self._uncovered(previous, parameter)
+            self._grow_horizontally(previous, parameter, uncovered)
+            self._grow_vertically(uncovered)
+        return [self._fill(row) for row in self.rows]
+
+    def _row(self, interaction: Iterable[Tuple[int, int]]) -> Row:
+        row: Row = [None] * len(self.names)
+        for p, v in interaction:
+            row[p] = v
+        return row
+
+    def _allowed(self, row: Row) -> bool:
+        if not self.constraints:
+            return True
+        case = {self.names[p]: self.values[p][v] for p, v in enumerate(row) if v is not None}
+        return all(constraint(case) for constraint in self.constraints)
+
+    def _extendable(self, row: Row) -> bool:
+        # A row that passes the constraints may still have no complete case, so the
+        # interactions are only taken if at least one case can contain them
+        if not self.constraints:
+            return True
+        key = tuple(row)
+        if key not in self.extendable:
+            self.extendable[key] = self._complete(list(row), shuffle=False) is not None
+        return self.extendable[key]
+
+    def _complete(self, row: Row, shuffle: bool) -> Optional[Tuple[int, ...]]:
+        if not self._allowed(row):
+            return None
+        missing = next((p for p, v in enumerate(row) if v is None), None)
+        if missing is None:
+            return tuple(v for v in row if v is not None)
+        count = len(self.values[missing])
+        for value in self.rng.permutation(count).tolist() if shuffle else range(count):
+            row[missing] = value
+            if (case := self._complete(row, shuffle)) is not None:
+                return case
+        row[missing] = None
+        return None
+
+    def _uncovered(self, previous: List[int], parameter: int) -> Set[Interaction]:
+        uncovered = set()
+        for others in combinations(previous, self.strength - 1):
+            parameters = (*others, parameter)
+            for value_indexes in product(*(range(len(self.values[p])) for p in parameters)):
+                interaction = tuple(zip(parameters, value_indexes))
+                if self._extendable(self._row(interaction)):
+                    uncovered.add(interaction)
+        return uncovered
+
+    def _covered(self, row: Row, previous: List[int], parameter: int) -> Set[Interaction]:
+        # The values that don't matter yet can't cover anything
+        assigned = [(p, v) for p in previous if (v := row[p]) is not None]
+        value = row[parameter]
+        if value is None:
+            return set()
+        return {
+            (*others, (parameter, value)) for others in combinations(assigned, self.strength - 1)
+        }
+
+    def _grow_horizontally(
+        self,
+        previous: List[int],
+        parameter: int,
+        uncovered: Set[Interaction],
+    ) -> None:
+        for row in self.rows:
+            best_value, best_covered = None, set()
+            for value in self.rng.permutation(len(self.values[parameter])).tolist():
+                row[parameter] = value
+                if not self._extendable(row):
+                    continue
+                covered = self._covered(row, previous, parameter) & uncovered
+                if best_value is None or len(covered) > len(best_covered):
+                    best_value, best_covered = value, covered
+            row[parameter] = best_value
+            uncovered -= best_covered
+
+    def _grow_vertically(self, uncovered: Set[Interaction]) -> None:
+        for interaction in sorted(uncovered):
+            if not any(self._merge(row, interaction) for row in self.rows):
+                self.rows.append(self._row(interaction))
+
+    def _merge(self, row: Row, interaction: Interaction) -> bool:
+        if any(row[p] not in (None, v) for p, v in interaction):
+            return False
+        missing = [p for p, _ in interaction if row[p] is None]
+        for p, v in interaction:
+            row[p] = v
+        if self._extendable(row):
+            return True
+        for p in missing:
+            row[p] = None
+        return False
+
+    def _fill(self, row: Row) -> Tuple[Any, ...]:
+        case = self._complete(row, shuffle=True)
+        if case is None:
+            raise ValueError("No case satisfies the constraints")
+        return tuple(self.values[p][v] for p, v in enumerate(case))
@@ -1,20 +1,60 @@
 from __future__ import annotations
 
 import datetime
-import random
 import string
 import textwrap
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence
 import uuid
 
+import numpy as np
+
 from .constants import LIST_EMAIL_DOMAINS, LOREM_TEXT
+from .data_factory import DataFactory, get_rng
 
+_TOP_LEVEL_DOMAINS = [domain.split(".")[-1] for domain in LIST_EMAIL_DOMAINS]
 
-def create_random_string(
+# Index 0 is a placeholder so the array can be indexed directly by the month number
+_DAYS_PER_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+Batch = Sequence[Any] | np.ndarray
+
+_LOREM_WORDS = LOREM_TEXT.split()
+
+
+def _as_list(values: Batch) -> List[Any]:
+    if isinstance(values, np.ndarray):
+        return values.tolist()
+    return list(values)
+
+
+def _choose(options: Sequence[Any], n: int, rng: np.random.Generator) -> List[Any]:
+    return [options[i] for i in rng.integers(0, len(options), size=n).tolist()]
+
+
+def _fixed_or_random(
+    value: Optional[int],
+    n: int,
+    low: int,
+    high: Any,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    if value:
+        return np.full(n, value)
+    return rng.integers(low, high, size=n, endpoint=True)
+
+
+def _random_signs(n: int, rng: np.random.Generator) -> np.ndarray:
+    return np.where(rng.integers(0, 2, size=n) == 1, 1, -1)
+
+
+def create_random_strings(
+    n: int,
     max_value: int = 100,
     use_punctuation: bool = False,
     use_digits: bool = True,
-) -> str:
+    factory: Optional[DataFactory] = None,
+) -> List[str]:
+    rng = get_rng(factory)
     min_value = 50
     characters = string.ascii_letters
     if use_digits:
@@ -23,97 +63,229 @@ def create_random_string(
         characters += string.punctuation
     if max_value < min_value:
         min_value += max_value - min_value
-    number = random.randint(min_value, max_value)
-    return "".join(random.choice(characters) for _ in range(number))
+    lengths = rng.integers(min_value, max_value, size=n, endpoint=True)
+    alphabet = np.frombuffer(characters.encode(), dtype=np.uint8)
+    indexes = rng.integers(0, len(alphabet), size=int(lengths.sum()))
+    text = alphabet[indexes].tobytes().decode()
+    ends = np.cumsum(lengths).tolist()
+    return [text[start:end] for start, end in zip([0] + ends[:-1], ends)]
 
 
-def create_random_text(max_value: int = 50) -> str:
-    return textwrap.wrap(LOREM_TEXT, max_value)[0]
+def create_random_string(
+    max_value: int = 100,
+    use_punctuation: bool = False,
+    use_digits: bool = True,
+    factory: Optional[DataFactory] = None,
+) -> str:
+    return create_random_strings(1, max_value, use_punctuation, use_digits, factory)[0]
+
+
+def create_random_texts(
+    n: int,
+    max_value: int = 50,
+    factory: Optional[DataFactory] = None,
+) -> List[str]:
+    # Each text is the lorem text starting from a random word, wrapping around at its end
+    starts = get_rng(factory).integers(0, len(_LOREM_WORDS), size=n).tolist()
+    return [
+        textwrap.wrap(" ".join(_LOREM_WORDS[start:] + _LOREM_WORDS[:start]), max_value)[0]
+        for start in starts
+    ]
 
 
-def create_random_bool() -> bool:
-    return random.randint(0, 1) == 1
+def create_random_text(max_value: int = 50, factory: Optional[DataFactory] = None) -> str:
+    return create_random_texts(1, max_value, factory)[0]
+
+
+def create_random_bools(n: int, factory: Optional[DataFactory] = None) -> np.ndarray:
+    return get_rng(factory).integers(0, 2, size=n) == 1
+
+
+def create_random_bool(factory: Optional[DataFactory] = None) -> bool:
+    return bool(create_random_bools(1, factory)[0])
+
+
+def create_random_jsons(n: int, factory: Optional[DataFactory] = None) -> List[Dict]:
+    rng = get_rng(factory)
+    choices = list(
+        zip(
+            create_random_strings(n, factory=factory),
+            create_random_bools(n, factory).tolist(),
+            [
+                value.strftime("%m/%d/%Y, %H:%M:%S")
+                for value in create_random_datetimes(n, factory=factory)
+            ],
+            create_random_floats(n, factory=factory).tolist(),
+        )
+    )
+    keys = rng.integers(0, 4, size=(n, 3)).tolist()
+    values = rng.integers(0, 4, size=(n, 3)).tolist()
+    return [
+        {row[key]: row[value] for key, value in zip(row_keys, row_values)}
+        for row, row_keys, row_values in zip(choices, keys, values)
+    ]
 
 
-def create_random_json() -> Dict:
-    choices = {
-        1: create_random_string(),
-        2: create_random_bool(),
-        3: create_random_datetime().strftime(
-            "%m/%d/%Y, %H:%M:%S",
-        ),
-        4: create_random_float(),
-    }
-    return {choices[random.randint(1, 4)]: choices[random.randint(1, 4)] for _ in range(3)}
+def create_random_json(factory: Optional[DataFactory] = None) -> Dict:
+    return create_random_jsons(1, factory)[0]
+
+
+def create_random_slugs(
+    n: int,
+    max_value: int = 50,
+    use_digits: bool = True,
+    factory: Optional[DataFactory] = None,
+) -> List[str]:
+    words = create_random_strings(
+        n * 4,
+        max_value=max_value,
+        use_punctuation=False,
+        use_digits=use_digits,
+        factory=factory,
+    )
+    return ["-".join(words[i : i + 4])[:max_value] for i in range(0, n * 4, 4)]
 
 
 def create_random_slug(
     max_value: int = 50,
     use_digits: bool = True,
+    factory: Optional[DataFactory] = None,
 ) -> str:
-    return "-".join(
-        [
-            create_random_string(
-                max_value=max_value,
-                use_punctuation=False,
-                use_digits=use_digits,
-            )
-            for _ in range(4)
-        ]
-    )[:max_value]
-
-
-def create_random_email(max_value: int = 25) -> str:
-    email_name = create_random_string(max_value)
-    email_domain = random.choice(LIST_EMAIL_DOMAINS)
-    return f"{email_name}@{email_domain}"
-
-
-def create_random_url(max_value: int = 20, secure=True) -> str:
-    domain = create_random_string(max_value)
-    top_level_domain = random.choice(LIST_EMAIL_DOMAINS).split(".")[-1]
+    return create_random_slugs(1, max_value, use_digits, factory)[0]
+
+
+def create_random_emails(
+    n: int,
+    max_value: int = 25,
+    factory: Optional[DataFactory] = None,
+) -> List[str]:
+    email_names = create_random_strings(n, max_value, factory=factory)
+    email_domains = _choose(LIST_EMAIL_DOMAINS, n, get_rng(factory))
+    return [f"{name}@{domain}" for name, domain in zip(email_names, email_domains)]
+
+
+def create_random_email(max_value: int = 25, factory: Optional[DataFactory] = None) -> str:
+    return create_random_emails(1, max_value, factory)[0]
+
+
+def create_random_urls(
+    n: int,
+    max_value: int = 20,
+    secure=True,
+    factory: Optional[DataFactory] = None,
+) -> List[str]:
+    domains = create_random_strings(n, max_value, factory=factory)
+    top_level_domains = _choose(_TOP_LEVEL_DOMAINS, n, get_rng(factory))
     protocol = "https" if secure else "http"
-    return f"{protocol}://{domain}.{top_level_domain}"
+    return [f"{protocol}://{domain}.{tld}" for domain, tld in zip(domains, top_level_domains)]
 
 
-def create_random_uuid(kind: int = 4, **kwargs) -> uuid.UUID:
-    # TODO fix and do a better implementation
-    uuids = {
-        1: uuid.uuid1,
-        3: uuid.uuid3,
-        4: uuid.uuid4,
-        5: uuid.uuid5,
-    }
+def create_random_url(
+    max_value: int = 20,
+    secure=True,
+    factory: Optional[DataFactory] = None,
+) -> str:
+    return create_random_urls(1, max_value, secure, factory)[0]
+
+
+def create_random_uuids(
+    n: int,
+    kind: int = 4,
+    factory: Optional[DataFactory] = None,
+    **kwargs,
+) -> List[uuid.UUID]:
+    if kind != 4:
+        return [create_random_uuid(kind, factory, **kwargs) for _ in range(n)]
+    data = get_rng(factory).bytes(16 * n)
+    return [uuid.UUID(bytes=data[i : i + 16], version=4) for i in range(0, 16 * n, 16)]
+
+
+def create_random_uuid(
+    kind: int = 4,
+    factory: Optional[DataFactory] = None,
+    **kwargs,
+) -> uuid.UUID:
+    name_based = {3: uuid.uuid3, 5: uuid.uuid5}
     if kind == 4:
-        return uuids[kind]()
-    if ("namespace" or "name") in kwargs:
-        return uuids[kind](**kwargs)
-    try:
-        final_uuid = uuids[kind](**kwargs)
-    except Exception:
-        final_uuid = uuids[kind]()
-    return final_uuid
+        return create_random_uuids(1, factory=factory)[0]
+    if kind in name_based:
+        namespace = kwargs.get("namespace", uuid.NAMESPACE_URL)
+        name = kwargs.get("name") or create_random_string(factory=factory)
+        return name_based[kind](namespace, name)
+    if kind == 1 and kwargs:
+        return uuid.uuid1(**kwargs)
+    # Without a node nor a clock sequence, the time based ones are random, so they can be seeded
+    return uuid.UUID(bytes=get_rng(factory).bytes(16), version=kind)
+
+
+def _random_date_parts(
+    n: int,
+    day: Optional[int] = None,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> List[List[int]]:
+    rng = rng or get_rng()
+    months = _fixed_or_random(month, n, 1, 12, rng)
+    days = _fixed_or_random(day, n, 1, _DAYS_PER_MONTH[months], rng)
+    years = _fixed_or_random(year, n, 1900, 2100, rng)
+    return [years.tolist(), months.tolist(), days.tolist()]
+
+
+def _random_hour_parts(
+    n: int,
+    hour: Optional[int] = None,
+    minute: Optional[int] = None,
+    second: Optional[int] = None,
+    microsecond: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> List[List[int]]:
+    rng = rng or get_rng()
+    return [
+        _fixed_or_random(hour, n, 0, 23, rng).tolist(),
+        _fixed_or_random(minute, n, 0, 59, rng).tolist(),
+        _fixed_or_random(second, n, 0, 59, rng).tolist(),
+        _fixed_or_random(microsecond, n, 0, 59, rng).tolist(),
+    ]
+
+
+def create_random_dates(
+    n: int,
+    day: Optional[int] = None,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    factory: Optional[DataFactory] = None,
+) -> List[datetime.date]:
+    return [
+        datetime.date(year, month, day)
+        for year, month, day in zip(*_random_date_parts(n, day, month, year, get_rng(factory)))
+    ]
 
 
 def create_random_date(
     day: Optional[int] = None,  # type: ignore
     month: Optional[int] = None,  # type: ignore
     year: Optional[int] = None,  # type: ignore
+    factory: Optional[DataFactory] = None,
 ) -> datetime.date:
-    month = month or random.randint(1, 12)
-    if month == 2:
-        max_day = 28
-    elif month in {1, 3, 5, 7, 8, 10, 12}:
-        max_day = 31
-    else:
-        max_day = 30
-    day = day or random.randint(1, max_day)
-    year = year or random.randint(1900, 2100)
-    return datetime.date(
-        year=year,
-        month=month,
-        day=day,
-    )
+    return create_random_dates(1, day, month, year, factory)[0]
+
+
+def create_random_hours(
+    n: int,
+    hour: Optional[int] = None,
+    minute: Optional[int] = None,
+    second: Optional[int] = None,
+    microsecond: Optional[int] = None,
+    tzinfo: datetime.timezone = datetime.timezone.utc,
+    factory: Optional[DataFactory] = None,
+) -> List[datetime.time]:
+    return [
+        datetime.time(hour, minute, second, microsecond, tzinfo)
+        for hour, minute, second, microsecond in zip(
+            *_random_hour_parts(n, hour, minute, second, microsecond, get_rng(factory))
+        )
+    ]
 
 
 def create_random_hour(
@@ -122,18 +294,31 @@ def create_random_hour(
     second: Optional[int] = None,
     microsecond: Optional[int] = None,
     tzinfo: datetime.timezone = datetime.timezone.utc,
+    factory: Optional[DataFactory] = None,
 ) -> datetime.time:
-    hour = hour or random.randint(0, 23)
-    minute = minute or random.randint(0, 59)
-    second = second or random.randint(0, 59)
-    microsecond = microsecond or random.randint(0, 59)
-    return datetime.time(
-        hour,
-        minute,
-        second,
-        microsecond,
-        tzinfo,
-    )
+    return create_random_hours(1, hour, minute, second, microsecond, tzinfo, factory)[0]
+
+
+def create_random_datetimes(
+    n: int,
+    day: Optional[int] = None,
+    month: Optional[int] = None,
+    year: Optional[int] = None,
+    hour: Optional[int] = None,
+    minute: Optional[int] = None,
+    second: Optional[int] = None,
+    microsecond: Optional[int] = None,
+    tzinfo: datetime.timezone = datetime.timezone.utc,
+    factory: Optional[DataFactory] = None,
+) -> List[datetime.datetime]:
+    rng = get_rng(factory)
+    return [
+        datetime.datetime(year, month, day, hour, minute, second, microsecond, tzinfo=tzinfo)
+        for year, month, day, hour, minute, second, microsecond in zip(
+            *_random_date_parts(n, day, month, year, rng),
+            *_random_hour_parts(n, hour, minute, second, microsecond, rng),
+        )
+    ]
 
 
 def create_random_datetime(
@@ -145,106 +330,176 @@ def create_random_datetime(
     second: Optional[int] = None,
     microsecond: Optional[int] = None,
     tzinfo: datetime.timezone = datetime.timezone.utc,
+    factory: Optional[DataFactory] = None,
 ) -> datetime.datetime:
-    date = create_random_date(
-        day=day,
-        month=month,
-        year=year,
-    )
-    time = create_random_hour(
-        hour=hour,
-        minute=minute,
-        second=second,
-        microsecond=microsecond,
-        tzinfo=tzinfo,
-    )
-    return datetime.datetime.combine(
-        date=date,
-        time=time,
-        tzinfo=tzinfo,
-    )
+    return create_random_datetimes(
+        1, day, month, year, hour, minute, second, microsecond, tzinfo, factory
+    )[0]
 
 
-def create_random_integer(
+def create_random_integers(
+    n: int,
     min_value: int = 0,
     max_value: int = 10000000,
-) -> int:
+    factory: Optional[DataFactory] = None,
+) -> np.ndarray:
     if max_value < min_value:
         min_value += max_value - min_value
-    fnct = random.choice(
-        [
-            create_random_negative_integer,
-            create_random_positive_integer,
-        ]
-    )
-    return fnct(min_value, max_value)
+    signs = _random_signs(n, get_rng(factory))
+    return create_random_positive_integers(n, min_value, max_value, factory) * signs
+
+
+def create_random_integer(
+    min_value: int = 0,
+    max_value: int = 10000000,
+    factory: Optional[DataFactory] = None,
+) -> int:
+    return int(create_random_integers(1, min_value, max_value, factory)[0])
+
+
+def create_random_negative_integers(
+    n: int,
+    min_value: int = 0,
+    max_value: int = 10000000,
+    factory: Optional[DataFactory] = None,
+) -> np.ndarray:
+    return create_random_positive_integers(n, min_value, max_value, factory) * -1
 
 
 def create_random_negative_integer(
     min_value: int = 0,
     max_value: int = 10000000,
+    factory: Optional[DataFactory] = None,
 ) -> int:
-    return random.randint(min_value, max_value) * -1
+    return int(create_random_negative_integers(1, min_value, max_value, factory)[0])
+
+
+def create_random_positive_integers(
+    n: int,
+    min_value: int = 0,
+    max_value: int = 10000000,
+    factory: Optional[DataFactory] = None,
+) -> np.ndarray:
+    return get_rng(factory).integers(min_value, max_value, size=n, endpoint=True)
 
 
 def create_random_positive_integer(
     min_value: int = 0,
     max_value: int = 10000000,
+    factory: Optional[DataFactory] = None,
 ) -> int:
-    return random.randint(min_value, max_value)
+    return int(create_random_positive_integers(1, min_value, max_value, factory)[0])
 
 
-def create_random_float(
+def create_random_floats(
+    n: int,
     min_value: float = 0,
     max_value: float = 10000000,
     after_coma: int = 2,
-) -> float:
+    factory: Optional[DataFactory] = None,
+) -> np.ndarray:
     if max_value < min_value:
         min_value += max_value - min_value
-    fnct = random.choice(
-        [
-            create_random_negative_float,
-            create_random_positive_float,
-        ]
-    )
-    return fnct(min_value, max_value, after_coma)
+    signs = _random_signs(n, get_rng(factory))
+    return create_random_positive_floats(n, min_value, max_value, after_coma, factory) * signs
+
+
+def create_random_float(
+    min_value: float = 0,
+    max_value: float = 10000000,
+    after_coma: int = 2,
+    factory: Optional[DataFactory] = None,
+) -> float:
+    return float(create_random_floats(1, min_value, max_value, after_coma, factory)[0])
+
+
+def create_random_positive_floats(
+    n: int,
+    min_value: float = 0.0,
+    max_value: float = 10000000.0,
+    after_coma: int = 2,
+    factory: Optional[DataFactory] = None,
+) -> np.ndarray:
+    return np.round(get_rng(factory).uniform(min_value, max_value, size=n), after_coma)
 
 
 def create_random_positive_float(
     min_value: float = 0.0,
     max_value: float = 10000000.0,
     after_coma: int = 2,
+    factory: Optional[DataFactory] = None,
 ) -> float:
-    return round(random.uniform(min_value, max_value), after_coma)
+    return float(create_random_positive_floats(1, min_value, max_value, after_coma, factory)[0])
+
+
+def create_random_negative_floats(
+    n: int,
+    min_value: float = 0.0,
+    max_value: float = 10000000.0,
+    after_coma: int = 2,
+    factory: Optional[DataFactory] = None,
+) -> np.ndarray:
+    return create_random_positive_floats(n, min_value, max_value, after_coma, factory) * -1.0
 
 
 def create_random_negative_float(
     min_value: float = 0.0,
     max_value: float = 10000000.0,
     after_coma: int = 2,
+    factory: Optional[DataFactory] = None,
 ) -> float:
-    return round(random.uniform(min_value, max_value), after_coma) * -1.0
+    return float(create_random_negative_floats(1, min_value, max_value, after_coma, factory)[0])
 
 
 def create_random_list(
     min_length: int = 0,
     max_length: int = 10000,
     types: Optional[List[str]] = None,
+    factory: Optional[DataFactory] = None,
 ) -> List[Any]:
     types = types or ["any"]
-    return [_get_data_by_type(random.choice(types)) for _ in range(min_length, max_length)]
-
-
-def _get_data_by_type(data_type: str, **kwargs) -> Any:
-    data_generator = {
-        "datetime": create_random_datetime,
-        "date": create_random_date,
-        "time": create_random_hour,
-        "float": create_random_float,
-        "int": create_random_integer,
-        "str": create_random_string,
-        "dict": create_random_json,
-        "bool": create_random_bool,
-    }
-    data_generator["any"] = random.choice(list(data_generator.values()))
-    return data_generator[data_type](**kwargs)  # type: ignore
+    return _get_mixed_batch(types, max(max_length - min_length, 0), factory)
+
+
+_BATCH_GENERATORS: Dict[str, Callable[..., Batch]] = {
+    "datetime": create_random_datetimes,
+    "date": create_random_dates,
+    "time": create_random_hours,
+    "float": create_random_floats,
+    "int": create_random_integers,
+    "str": create_random_strings,
+    "dict": create_random_jsons,
+    "bool": create_random_bools,
+}
+
+
+def _get_mixed_batch(
+    data_types: List[str],
+    n: int,
+    factory: Optional[DataFactory] = None,
+) -> List[Any]:
+    kinds = get_rng(factory).integers(0, len(data_types), size=n)
+    batch: List[Any] = [None] * n
+    for index, data_type in enumerate(data_types):
+        positions = np.flatnonzero(kinds == index).tolist()
+        values = _as_list(_get_batch_by_type(data_type, len(positions), factory))
+        for position, value in zip(positions, values):
+            batch[position] = value
+    return batch
+
+
+def _get_batch_by_type(
+    data_type: str,
+    n: int,
+    factory: Optional[DataFactory] = None,
+    **kwargs,
+) -> Batch:
+    if data_type == "any":
+        return _get_mixed_batch(list(_BATCH_GENERATORS), n, factory)
+    return _BATCH_GENERATORS[data_type](n, factory=factory, **kwargs)
+
+
+def _get_data_by_type(data_type: str, factory: Optional[DataFactory] = None, **kwargs) -> Any:
+    if data_type == "any":
+        data_type = _choose(list(_BATCH_GENERATORS), 1, get_rng(factory))[0]
+    return _as_list(_get_batch_by_type(data_type, 1, factory, **kwargs))[0]
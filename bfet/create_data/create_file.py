@@ -1,13 +1,140 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 import csv
-from typing import Any, Dict
+import datetime
+from enum import Enum
+from itertools import repeat
+import json
+import os
+import shutil
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
 
-from .create_data import _get_data_by_type
+import numpy as np
 
+from .create_data import Batch, _as_list, _get_batch_by_type
+from .data_factory import DataFactory, default_factory
 
-def create(filename: str, columns: Dict[str, Any]) -> None:
-    _create_csv(filename, columns)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+def create(
+    filename: str,
+    columns: Dict[str, Any],
+    num_rows: int = 500000,
+    batch_size: int = 5000,
+    processes: int = 1,
+    factory: Optional[DataFactory] = None,
+    file_format: str = "",
+) -> None:
+    """Create a file filled with random data. The data is created and written column by column,
+    so the columnar formats (parquet, arrow, npy and npz) never go through a list per row.
+
+    Parameters
+    ----------
+        filename : str
+            The path of the file to create
+
+        columns : Dict[str, Any]
+            The name of each column with its settings, like {"age": {"type": "int"}}. Any other
+            setting is passed to the generator, like {"age": {"type": "int", "max_value": 99}}
+
+        num_rows : int
+            The number of rows to create, by default 500000
+
+        batch_size : int
+            The number of rows created and written at once, by default 5000
+
+        processes : int
+            The number of processes used to create the rows. With more than one, each process
+            writes its own range of rows into a shard and the shards are joined in order,
+            by default 1
+
+        factory : Optional[DataFactory]
+            The factory used to create the data. When using several processes, each one gets
+            its own child of the factory, so the same seed and processes create the same file,
+            by default None
+
+        file_format : str
+            One of csv, parquet, arrow, feather, npy or npz. Parquet and arrow need pyarrow to be
+            installed. If empty, it's taken from the filename's extension, by default ""
+    """
+    file_format = file_format or os.path.splitext(filename)[1].lstrip(".").lower() or "csv"
+    if file_format not in WRITERS:
+        raise ValueError(f"{file_format} is not supported, use one of {', '.join(WRITERS)}")
+    if processes > 1:
+        if file_format != "csv":
+            raise ValueError("Only csv files can be created with more than one process")
+        _create_csv_in_parallel(filename, columns, num_rows, batch_size, processes, factory)
+    else:
+        WRITERS[file_format](filename, columns, num_rows, batch_size, factory)
+
+
+def _get_column(
+    settings: Dict[str, Any],
+    size: int,
+    factory: Optional[DataFactory] = None,
+) -> Batch:
+    kwargs = {key: value for key, value in settings.items() if key != "type"}
+    return _get_batch_by_type(settings["type"], size, factory, **kwargs)
+
+
+class BatchFormat(Enum):
+    TUPLES = "TUPLES"
+    DICTS = "DICTS"
+    COLUMNS = "COLUMNS"
+
+
+def iter_rows(
+    columns: Dict[str, Dict[str, Any]],
+    num_rows: int,
+    batch_size: int = 5000,
+    batch_format: BatchFormat = BatchFormat.TUPLES,
+    factory: Optional[DataFactory] = None,
+) -> Iterator[Any]:
+    """Lazily create random data, one batch at a time. Only the batch being consumed is kept in
+    memory, so any number of rows can be streamed into bulk_create, requests or files.
+
+    Parameters
+    ----------
+        columns : Dict[str, Dict[str, Any]]
+            The name of each column with its settings, like {"age": {"type": "int"}}
+
+        num_rows : int
+            The total number of rows to create
+
+        batch_size : int
+            The number of rows in each batch, by default 5000
+
+        batch_format : BatchFormat
+            TUPLES yields a list of row tuples, DICTS a list of {column: value} rows and COLUMNS
+            a {column: values} dict where numeric columns are numpy arrays,
+            by default BatchFormat.TUPLES
+
+        factory : Optional[DataFactory]
+            The factory used to create the data, by default None
+
+    Yields
+    ------
+        List[Tuple] | List[Dict[str, Any]] | Dict[str, Sequence[Any]]
+            A batch of at most batch_size rows
+    """
+    names = list(columns)
+    for start in range(0, num_rows, batch_size):
+        size = min(batch_size, num_rows - start)
+        batch = {name: _get_column(settings, size, factory) for name, settings in columns.items()}
+        if batch_format == BatchFormat.COLUMNS:
+            yield batch
+            continue
+        rows = zip(*(_as_list(values) for values in batch.values()))
+        if batch_format == BatchFormat.DICTS:
+            yield [dict(zip(names, row)) for row in rows]
+        else:
+            yield list(rows)
 
 
 def _create_csv(
@@ -15,12 +142,193 @@ def _create_csv(
     columns: Dict[str, Dict[str, Any]],
     num_rows: int = 500000,
     batch_size: int = 5000,
+    factory: Optional[DataFactory] = None,
 ) -> None:
     with open(filename, "w", newline="") as f:
         csv_writer = csv.writer(f)
         csv_writer.writerow(columns)
-        for _ in range(num_rows // batch_size):
-            csv_writer.writerows(
-                [_get_data_by_type(data_type=value["type"]) for value in columns.values()]
-                for _ in range(batch_size)
+        _write_csv_rows(csv_writer, columns, num_rows, batch_size, factory)
+
+
+def _write_csv_rows(
+    csv_writer: Any,
+    columns: Dict[str, Dict[str, Any]],
+    num_rows: int,
+    batch_size: int,
+    factory: Optional[DataFactory] = None,
+) -> None:
+    for batch in iter_rows(columns, num_rows, batch_size, factory=factory):
+        csv_writer.writerows(batch)
+
+
+def _create_csv_shard(
+    filename: str,
+    columns: Dict[str, Dict[str, Any]],
+    num_rows: int,
+    batch_size: int,
+    factory: DataFactory,
+) -> str:
+    with open(filename, "w", newline="") as f:
+        _write_csv_rows(csv.writer(f), columns, num_rows, batch_size, factory)
+    return filename
+
+
+def _split_rows(num_rows: int, parts: int) -> List[int]:
+    rows_per_part, remaining_rows = divmod(num_rows, parts)
+    sizes = [rows_per_part + (i < remaining_rows) for i in range(parts)]
+    return [size for size in sizes if size]
+
+
+def _create_csv_in_parallel(
+    filename: str,
+    columns: Dict[str, Dict[str, Any]],
+    num_rows: int,
+    batch_size: int,
+    processes: int,
+    factory: Optional[DataFactory] = None,
+) -> None:
+    shard_rows = _split_rows(num_rows, processes)
+    shard_names = [f"{filename}.{i}.part" for i in range(len(shard_rows))]
+    factories = (factory or default_factory).spawn(len(shard_rows))
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            shards = executor.map(
+                _create_csv_shard,
+                shard_names,
+                repeat(columns),
+                shard_rows,
+                repeat(batch_size),
+                factories,
             )
+            with open(filename, "w", newline="") as f:
+                csv.writer(f).writerow(columns)
+                for shard_name in shards:
+                    with open(shard_name, newline="") as shard:
+                        shutil.copyfileobj(shard, f)
+    finally:
+        for shard_name in shard_names:
+            if os.path.exists(shard_name):
+                os.remove(shard_name)
+
+
+def _to_json_strings(values: Sequence[Any]) -> List[str]:
+    return [json.dumps(value, default=str) for value in values]
+
+
+def _to_arrow(data_type: str, values: Sequence[Any]) -> Any:
+    if data_type == "dict":
+        return pa.array(_to_json_strings(values))
+    if data_type == "any":
+        return pa.array([str(value) for value in values])
+    return pa.array(values)
+
+
+def _to_numpy(data_type: str, values: Sequence[Any]) -> np.ndarray:
+    if isinstance(values, np.ndarray):
+        return values
+    if data_type == "datetime":
+        utc = datetime.timezone.utc
+        naive_values = [value.astimezone(utc).replace(tzinfo=None) for value in values]
+        return np.array(naive_values, dtype="datetime64[us]")
+    if data_type == "date":
+        return np.array(values, dtype="datetime64[D]")
+    if data_type == "time":
+        return np.array([value.isoformat() for value in values])
+    if data_type == "dict":
+        return np.array(_to_json_strings(values))
+    if data_type == "any":
+        return np.array(values, dtype=object)
+    return np.array(values)
+
+
+def _iter_record_batches(
+    columns: Dict[str, Dict[str, Any]],
+    num_rows: int,
+    batch_size: int,
+    factory: Optional[DataFactory] = None,
+) -> Iterator[Any]:
+    if pa is None:
+        raise ImportError("pyarrow is needed to create parquet and arrow files")
+    for batch in iter_rows(columns, num_rows, batch_size, BatchFormat.COLUMNS, factory):
+        yield pa.RecordBatch.from_arrays(
+            [_to_arrow(columns[name]["type"], values) for name, values in batch.items()],
+            names=list(batch),
+        )
+
+
+def _schema(columns: Dict[str, Dict[str, Any]]) -> Any:
+    # The types of a column don't depend on its values, so a single row gives the schema even
+    # when no rows are written
+    return next(_iter_record_batches(columns, 1, 1, DataFactory(0))).schema
+
+
+def _create_parquet(
+    filename: str,
+    columns: Dict[str, Dict[str, Any]],
+    num_rows: int = 500000,
+    batch_size: int = 5000,
+    factory: Optional[DataFactory] = None,
+) -> None:
+    with pq.ParquetWriter(filename, _schema(columns)) as writer:
+        for batch in _iter_record_batches(columns, num_rows, batch_size, factory):
+            writer.write_batch(batch)
+
+
+def _create_arrow(
+    filename: str,
+    columns: Dict[str, Dict[str, Any]],
+    num_rows: int = 500000,
+    batch_size: int = 5000,
+    factory: Optional[DataFactory] = None,
+) -> None:
+    with pa.ipc.new_file(filename, _schema(columns)) as writer:
+        for batch in _iter_record_batches(columns, num_rows, batch_size, factory):
+            writer.write_batch(batch)
+
+
+def _create_numpy_columns(
+    columns: Dict[str, Dict[str, Any]],
+    num_rows: int,
+    batch_size: int,
+    factory: Optional[DataFactory] = None,
+) -> Dict[str, np.ndarray]:
+    batches: Dict[str, List[np.ndarray]] = {name: [] for name in columns}
+    for batch in iter_rows(columns, num_rows, batch_size, BatchFormat.COLUMNS, factory):
+        for name, values in batch.items():
+            batches[name].append(_to_numpy(columns[name]["type"], values))
+    return {
+        name: np.concatenate(arrays) if arrays else np.array([]) for name, arrays in batches.items()
+    }
+
+
+def _create_npy(
+    filename: str,
+    columns: Dict[str, Dict[str, Any]],
+    num_rows: int = 500000,
+    batch_size: int = 5000,
+    factory: Optional[DataFactory] = None,
+) -> None:
+    arrays = _create_numpy_columns(columns, num_rows, batch_size, factory)
+    dtype = [(name, array.dtype) for name, array in arrays.items()]
+    np.save(filename, np.rec.fromarrays(list(arrays.values()), dtype=dtype))
+
+
+def _create_npz(
+    filename: str,
+    columns: Dict[str, Dict[str, Any]],
+    num_rows: int = 500000,
+    batch_size: int = 5000,
+    factory: Optional[DataFactory] = None,
+) -> None:
+    arrays: Dict[str, Any] = _create_numpy_columns(columns, num_rows, batch_size, factory)
+    np.savez(filename, **arrays)
+
+
+WRITERS: Dict[str, Callable[..., None]] = {
+    "csv": _create_csv,
+    "parquet": _create_parquet,
+    "arrow": _create_arrow,
+    "feather": _create_arrow,
+    "npy": _create_npy,
+    "npz": _create_npz,
+}
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections.abc import Sequence
 from enum import Enum
-from itertools import chain, combinations, product
-from random import choices, randrange
+from itertools import accumulate, chain, combinations, product
+import math
+import os
 from typing import (
     Any,
     Callable,
@@ -10,30 +14,170 @@ from typing import (
     Dict,
     FrozenSet,
     Iterable,
+    Iterator,
     List,
+    Mapping,
     Optional,
     Set,
     Tuple,
 )
 
+import numpy as np
+
+from .data_factory import DataFactory, get_rng
+
 AnySizedIterable = List[Any] | Set[Any] | FrozenSet[Any] | Tuple[Any] | Deque[Any]
 CastableIterable = List[Any] | Tuple[Any] | Deque[Any]
 
+ExclusionPredicate = Callable[[Tuple[Any, ...]], bool]
+
+MAX_ANY_VARIATIONS = 1024
+MAX_REDRAWS = 100
+
+
+class IndexedSequence(Sequence, ABC):
+    """A read-only sequence whose items are computed from their index when they are needed.
+    Slicing it returns another lazy sequence, so a huge sequence can be split across processes
+    or workers, like with sequence[worker::workers], without creating the other items."""
+
+    @property
+    @abstractmethod
+    def size(self) -> int:
+        """The number of items, which unlike len() can be higher than sys.maxsize"""
+
+    @abstractmethod
+    def _item(self, i: int) -> Any:
+        """The item at the index i, which is already between 0 and size"""
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return SequenceSlice(self, range(*index.indices(self.size)))
+        size = self.size
+        i = index + size if index < 0 else index
+        if not 0 <= i < size:
+            raise IndexError(f"{type(self).__name__} index out of range")
+        return self._item(i)
 
-def create_all_combinations(data: AnySizedIterable, minimum: int = 1) -> chain[Any]:
-    return chain.from_iterable(combinations(data, i) for i in range(minimum, len(data) + 1))
+    def __iter__(self) -> Iterator[Any]:
+        return map(self._item, range(self.size))
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+
+class SequenceSlice(IndexedSequence):
+    def __init__(self, sequence: IndexedSequence, indexes: range) -> None:
+        self.sequence = sequence
+        self.indexes = indexes
+
+    @property
+    def size(self) -> int:
+        start, stop, step = self.indexes.start, self.indexes.stop, self.indexes.step
+        if step < 0:
+            start, stop, step = -start, -stop, -step
+        return max(0, (stop - start + step - 1) // step)
+
+    def _item(self, i: int) -> Any:
+        return self.sequence._item(self.indexes[i])
+
+
+class CombinationSequence(IndexedSequence):
+    def __init__(self, data: AnySizedIterable, minimum: int = 1) -> None:
+        """Every combination of the items of data, from the shortest to the longest ones, in
+        the order of itertools.combinations. The i-th combination is unranked from i with the
+        combinatorial number system, so it's built without going through the previous ones.
+
+        Parameters
+        ----------
+            data : AnySizedIterable
+                The items to combine
+
+            minimum : int
+                The length of the shortest combinations, by default 1
+        """
+        self.data = tuple(data)
+        self.minimum = minimum
+        self._lengths = range(max(minimum, 0), len(self.data) + 1)
+        self._offsets = list(accumulate(math.comb(len(self.data), k) for k in self._lengths))
+
+    @property
+    def size(self) -> int:
+        return self._offsets[-1] if self._offsets else 0
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        return chain.from_iterable(combinations(self.data, k) for k in self._lengths)
+
+    def _item(self, i: int) -> Tuple[Any, ...]:
+        position = bisect_right(self._offsets, i)
+        rank = i - (self._offsets[position - 1] if position else 0)
+        return self._unrank(rank, self._lengths[position])
+
+    def _unrank(self, rank: int, length: int) -> Tuple[Any, ...]:
+        # The combinations starting with the j-th item are the ones of the next items
+        items = []
+        j = 0
+        for remaining in range(length, 0, -1):
+            while rank >= (count := math.comb(len(self.data) - j - 1, remaining - 1)):
+                rank -= count
+                j += 1
+            items.append(self.data[j])
+            j += 1
+        return tuple(items)
+
+
+class ProductSequence(IndexedSequence):
+    def __init__(self, data: Mapping[str, Iterable[Any]]) -> None:
+        """Every possible tuple made of one value of each key of data, in the order of
+        itertools.product. The i-th tuple is built from the digits of i in a mixed radix, where
+        each key is a digit whose base is its number of values.
+
+        Parameters
+        ----------
+            data : Mapping[str, Iterable[Any]]
+                The possible values of each key
+        """
+        self.data = data
+        self.values = [
+            values if isinstance(values, IndexedSequence) else tuple(values)
+            for values in data.values()
+        ]
+
+    @property
+    def size(self) -> int:
+        return math.prod(_size(values) for values in self.values)
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        return product(*self.values)
+
+    def _item(self, i: int) -> Tuple[Any, ...]:
+        items = []
+        for values in reversed(self.values):
+            i, j = divmod(i, _size(values))
+            items.append(values[j])
+        return tuple(reversed(items))
+
+
+def _size(values: Sequence) -> int:
+    return values.size if isinstance(values, IndexedSequence) else len(values)
+
+
+def create_all_combinations(data: AnySizedIterable, minimum: int = 1) -> CombinationSequence:
+    return CombinationSequence(data, minimum)
 
 
 def cast_all_combinations(
     data: AnySizedIterable,
     minimum: int = 1,
-    cast_to: Callable[[chain[Any]], CastableIterable] = list,
+    cast_to: Callable[[Iterable[Any]], CastableIterable] = list,
 ) -> CastableIterable:
     return cast_to(create_all_combinations(data=data, minimum=minimum))
 
 
-def create_possibilities(data: Dict[str, List[Any]]) -> Iterable:
-    return product(*iter(data.values()))
+def create_possibilities(data: Mapping[str, Iterable[Any]]) -> ProductSequence:
+    return ProductSequence(data)
 
 
 class Variations(Enum):
@@ -51,8 +195,9 @@ class Combinator:
         variations: Variations = Variations.ALL,
         number_of_variations: int = 0,
         can_be_empty: bool = True,
-        excluded_combinations: Optional[List[Any]] = None,
-        cast_to: Callable[[chain[Any]], CastableIterable] = list,
+        excluded_combinations: Optional[List[Iterable[Any] | ExclusionPredicate]] = None,
+        cast_to: Callable[[Iterable[Any]], CastableIterable] = list,
+        factory: Optional[DataFactory] = None,
     ) -> None:
         """
 
@@ -61,6 +206,13 @@ class Combinator:
         Selecting Variations.ALL will return all 4 variations. Nevertheless, if you go with
         Variations.SOME and set number_of_variations to a number higher than 4, you will have more
         than 4 results that may be duplicated.
+        Variations.ANY returns a random number of them, at most MAX_ANY_VARIATIONS.
+        Only Variations.ALL creates every combination, the others draw them one by one, so they
+        can be used with many options.
+        The excluded_combinations are never returned. Each one is either a combination of
+        options, in any order, or a function that takes a combination and returns True to
+        exclude it.
+        Pass a seeded DataFactory as factory to get the same variations on every run.
         """
         self.name = name
         self.options = options
@@ -69,7 +221,9 @@ class Combinator:
         self.can_be_empty = can_be_empty
         self.excluded_combinations = excluded_combinations
         self.cast_to = cast_to
+        self.factory = factory
         self._validate()
+        self._excluded_masks, self._exclusion_predicates = self._compile_exclusions()
 
     def _validate(self) -> None:
         if self.variations == Variations.EMPTY:
@@ -84,18 +238,228 @@ class Combinator:
             raise ValueError("If we want some variations, number_of_variations should be >=1")
         return None
 
+    def _compile_exclusions(self) -> Tuple[Set[int], List[ExclusionPredicate]]:
+        # A combination is the bitmask of the positions of its options, so finding an excluded
+        # one doesn't depend on its order or on the options being hashable
+        masks, predicates = set(), []
+        for excluded in self.excluded_combinations or []:
+            if callable(excluded):
+                predicates.append(excluded)
+                continue
+            if (mask := self._mask(excluded)) is not None:
+                masks.add(mask)
+        return masks, predicates
+
+    def _mask(self, combination: Iterable[Any]) -> Optional[int]:
+        positions = [self._position(option) for option in combination]
+        if None in positions:
+            return None
+        return sum(1 << position for position in set(positions))  # type: ignore
+
+    def _position(self, option: Any) -> Optional[int]:
+        return next((j for j, item in enumerate(self.options) if item == option), None)
+
+    def _is_excluded(self, mask: int, combination: Tuple[Any, ...]) -> bool:
+        return mask in self._excluded_masks or any(
+            predicate(combination) for predicate in self._exclusion_predicates
+        )
+
     def value(self) -> Dict[str, CastableIterable]:
-        return {self.name: self._get_values()[self.variations]}
-
-    def _get_values(self) -> Dict[Variations, CastableIterable]:
-        empty_as_int = 0 if self.can_be_empty else 1
-        all_combinations = cast_all_combinations(self.options, empty_as_int, self.cast_to)
-        return {
-            Variations.ANY: choices(
-                all_combinations,
-                k=randrange(empty_as_int, len(all_combinations)),
-            ),
-            Variations.ALL: all_combinations,
-            Variations.SOME: choices(all_combinations, k=self.number_of_variations),
-            Variations.EMPTY: [],
+        return {self.name: self._get_values()}
+
+    def _get_values(self) -> CastableIterable:
+        values: Dict[Variations, Callable[[], CastableIterable]] = {
+            Variations.ANY: self._any,
+            Variations.ALL: self._all,
+            Variations.SOME: lambda: self._choices(self.number_of_variations),
+            Variations.EMPTY: list,
         }
+        return values[self.variations]()
+
+    def _all(self) -> CastableIterable:
+        minimum = 0 if self.can_be_empty else 1
+        if not self.excluded_combinations:
+            return cast_all_combinations(self.options, minimum, self.cast_to)
+        return self.cast_to(self._iter_allowed(minimum))
+
+    def _iter_allowed(self, minimum: int) -> Iterator[Tuple[Any, ...]]:
+        for positions in create_all_combinations(list(range(len(self.options))), minimum):
+            combination = tuple(self.options[j] for j in positions)
+            if not self._is_excluded(sum(1 << j for j in positions), combination):
+                yield combination
+
+    def _any(self) -> List[Any]:
+        # Only the listed combinations are discounted, the predicates can't be counted
+        # without calling them with every combination
+        excluded = self._excluded_masks | (set() if self.can_be_empty else {0})
+        high = min(2 ** len(self.options) - len(excluded), MAX_ANY_VARIATIONS)
+        low = 0 if self.can_be_empty else 1
+        if high <= low:
+            raise ValueError("Every combination is excluded")
+        return self._choices(int(get_rng(self.factory).integers(low, high)))
+
+    def _choices(self, k: int) -> List[Any]:
+        # Each option is in a uniformly drawn combination with a probability of 1/2, so the
+        # combinations are drawn as random bitmasks instead of picked from all of them
+        if not self.options and not self.can_be_empty:
+            raise ValueError("There are no combinations without options")
+        rng = get_rng(self.factory)
+        masks = rng.integers(0, 2, size=(k, len(self.options)), dtype=bool)
+        redraws = 0
+        while (rejected := self._rejected(masks)).any():
+            if redraws == MAX_REDRAWS:
+                return self._choices_from_allowed(masks, rejected, rng)
+            masks[rejected] = rng.integers(
+                0, 2, size=(rejected.sum(), len(self.options)), dtype=bool
+            )
+            redraws += 1
+        return [self._combination(mask) for mask in masks.tolist()]
+
+    def _choices_from_allowed(
+        self,
+        masks: np.ndarray,
+        rejected: np.ndarray,
+        rng: np.random.Generator,
+    ) -> List[Any]:
+        # When almost every combination is excluded, the rest are drawn from the allowed ones
+        allowed = list(self._iter_allowed(0 if self.can_be_empty else 1))
+        if not allowed:
+            raise ValueError("Every combination is excluded")
+        picks = iter(rng.integers(0, len(allowed), size=int(rejected.sum())).tolist())
+        return [
+            allowed[next(picks)] if is_rejected else self._combination(mask)
+            for mask, is_rejected in zip(masks.tolist(), rejected.tolist())
+        ]
+
+    def _rejected(self, masks: np.ndarray) -> np.ndarray:
+        rejected = np.zeros(len(masks), dtype=bool)
+        if not self.can_be_empty:
+            rejected |= ~masks.any(axis=1)
+        if self._excluded_masks or self._exclusion_predicates:
+            for row, mask in enumerate(masks.tolist()):
+                bits = sum(1 << j for j, selected in enumerate(mask) if selected)
+                rejected[row] |= self._is_excluded(bits, self._combination(mask))
+        return rejected
+
+    def _combination(self, mask: List[bool]) -> Tuple[Any, ...]:
+        return tuple(option for option, selected in zip(self.options, mask) if selected)
+
+
+class CombinationMatrix:
+    def __init__(self, combinators: List[Combinator]) -> None:
+        """The test cases made of one variation of each combinator, like the ones of
+        create_possibilities with the values of the combinators. The variations of each one are
+        only created once, without duplicates, and the cases are built from their index when
+        they are needed, so large matrices can be iterated, split or parametrized.
+        A combinator without variations, like with Variations.EMPTY, adds its empty combination
+        to every case.
+
+        Parameters
+        ----------
+            combinators : List[Combinator]
+                The combinators of the fields of the cases, with different names
+        """
+        names = [combinator.name for combinator in combinators]
+        if len(set(names)) < len(names):
+            raise ValueError("Each combinator should have a different name")
+        self.combinators = combinators
+        self.names = names
+        self._cases: Optional[ProductSequence] = None
+
+    @property
+    def cases(self) -> ProductSequence:
+        """The cases as tuples with a combination for each combinator, in their order"""
+        if self._cases is None:
+            self._cases = create_possibilities(
+                {combinator.name: _unique_values(combinator) for combinator in self.combinators}
+            )
+        return self._cases
+
+    def __len__(self) -> int:
+        return len(self.cases)
+
+    def __iter__(self) -> Iterator[Dict[str, Tuple[Any, ...]]]:
+        return (dict(zip(self.names, case)) for case in self.cases)
+
+    def shard(self, worker: Optional[int] = None, workers: Optional[int] = None) -> IndexedSequence:
+        """The cases of a worker when they are split between several of them. pytest-xdist
+        workers need to collect the same tests, so use it inside the tests, or to split the
+        cases between separate runs, like the jobs of a CI.
+
+        Parameters
+        ----------
+            worker : Optional[int]
+                The number of the worker, from 0. If None, it's read from the
+                PYTEST_XDIST_WORKER environment variable, or 0, by default None
+
+            workers : Optional[int]
+                The number of workers. If None, it's read from the PYTEST_XDIST_WORKER_COUNT
+                environment variable, or 1, by default None
+
+        Returns
+        -------
+            IndexedSequence
+                Every workers-th case, starting with the worker-th one
+        """
+        if worker is None:
+            worker = int(os.environ.get("PYTEST_XDIST_WORKER", "gw0").removeprefix("gw"))
+        if workers is None:
+            workers = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", 1))
+        if not 0 <= worker < workers:
+            raise ValueError(f"The worker should be between 0 and {workers - 1}")
+        return self.cases[worker::workers]
+
+    def parametrize(
+        self,
+        worker: Optional[int] = None,
+        workers: Optional[int] = None,
+    ) -> Any:
+        """Create a pytest.mark.parametrize decorator whose arguments are the names of the
+        combinators and whose parameters are the cases, with ids made of their options
+
+        Parameters
+        ----------
+            worker : Optional[int]
+                If given with workers, only the cases of this worker are used, by default None
+
+            workers : Optional[int]
+                The number of workers the cases are split between, by default None
+
+        Returns
+        -------
+            Any
+                The pytest.mark.parametrize decorator
+        """
+        import pytest  # It's only needed to export the cases
+
+        cases = self.cases if workers is None else self.shard(worker, workers)
+        return pytest.mark.parametrize(self.names, cases, ids=_case_id)
+
+
+def _unique_values(combinator: Combinator) -> Sequence:
+    if combinator.variations == Variations.EMPTY:
+        return [()]
+    if combinator.variations == Variations.ALL:
+        # Every combination is already there once, so it's kept lazy
+        minimum = 0 if combinator.can_be_empty else 1
+        if not combinator.excluded_combinations:
+            return create_all_combinations(combinator.options, minimum)
+        values = list(combinator._iter_allowed(minimum))
+    else:
+        values = []
+        masks = set()
+        for combination in combinator.value()[combinator.name]:
+            mask = combinator._mask(combination)
+            if mask not in masks:
+                masks.add(mask)
+                values.append(tuple(combination))
+        # ANY can draw no variations, then the case only has the empty one if it's allowed
+        if not values and combinator.can_be_empty and not combinator._is_excluded(0, ()):
+            values.append(())
+    if not values:
+        raise ValueError("Every combination is excluded")
+    return values
+
+
+def _case_id(combination: Tuple[Any, ...]) -> str:
+    return "+".join(map(str, combination)) or "empty"
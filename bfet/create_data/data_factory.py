@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class DataFactory:
+    def __init__(self, seed: Optional[int | np.random.SeedSequence] = None) -> None:
+        """Holds its own random number generator, so the data created with it can be reproduced
+        and it does not share any state with other factories.
+
+        Parameters
+        ----------
+            seed : Optional[int | np.random.SeedSequence]
+                The seed used to initialize the generator. If none is passed, a random one is
+                taken from the OS and can be read back from the seed attribute, by default None
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def seed(self) -> int:
+        """The seed of the root factory. The children created by spawn share it, they are told
+        apart by their spawn_key"""
+        return self.seed_sequence.entropy  # type: ignore
+
+    @property
+    def spawn_key(self) -> Tuple[int, ...]:
+        """The position of the factory among the children of its root, empty for the root.
+        DataFactory(np.random.SeedSequence(seed, spawn_key=spawn_key)) creates the same stream"""
+        return tuple(self.seed_sequence.spawn_key)
+
+    def spawn(self, number_of_children: int) -> List[DataFactory]:
+        """Create independent child factories, one for each worker that generates data in
+        parallel. The children are fully determined by the parent's seed and the order in which
+        they are spawned.
+
+        Parameters
+        ----------
+            number_of_children : int
+                The number of child factories to create
+
+        Returns
+        -------
+            List[DataFactory]
+                The new factories, whose streams don't overlap with the parent's nor with each other
+        """
+        return [DataFactory(child) for child in self.seed_sequence.spawn(number_of_children)]
+
+
+default_factory = DataFactory()
+
+
+def get_rng(factory: Optional[DataFactory] = None) -> np.random.Generator:
+    return (factory or default_factory).rng
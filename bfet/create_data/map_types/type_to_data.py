@@ -1,7 +1,353 @@
 from __future__ import annotations
 
-from typing import Any
+import collections.abc
+import datetime
+import decimal
+import enum
+import math
+import types
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Literal,
+    Optional,
+    Union,
+    get_args,
+    get_origin,
+)
+import uuid
 
+from ..create_data import (
+    create_random_bool,
+    create_random_date,
+    create_random_datetime,
+    create_random_email,
+    create_random_float,
+    create_random_hour,
+    create_random_integer,
+    create_random_string,
+    create_random_url,
+    create_random_uuid,
+)
+from ..data_factory import DataFactory, get_rng
+from .types_as_str import (
+    BOOL,
+    BYTEARRAY,
+    BYTES,
+    COMPLEX,
+    DICT,
+    FLOAT,
+    FROZENSET,
+    INT,
+    LIST,
+    NONE,
+    SET,
+    STR,
+    TUPLE,
+)
 
-def map_type_to_data(type_: str) -> Any:
-    return
+ValueGenerator = Callable[[Optional[DataFactory]], Any]
+ClassCompiler = Callable[[type], Optional[ValueGenerator]]
+
+MAX_VALUE = 10000000
+MAX_ITEMS = 5
+
+
+class CyclicTypeError(ValueError):
+    """Raised by a ClassCompiler for a class that contains itself. The nearest Optional that
+    contains the class creates None instead"""
+
+
+TYPES_AS_STR: Dict[str, Any] = {
+    INT: int,
+    FLOAT: float,
+    COMPLEX: complex,
+    LIST: list,
+    TUPLE: tuple,
+    STR: str,
+    DICT: dict,
+    SET: set,
+    FROZENSET: frozenset,
+    BOOL: bool,
+    BYTES: bytes,
+    BYTEARRAY: bytearray,
+    NONE: type(None),
+}
+
+CONSTRAINTS = (
+    "gt",
+    "ge",
+    "lt",
+    "le",
+    "multiple_of",
+    "min_length",
+    "max_length",
+    "max_digits",
+    "decimal_places",
+)
+
+CLASSES_BY_NAME: Dict[str, ValueGenerator] = {
+    "EmailStr": lambda factory: create_random_email(factory=factory),
+    "NameEmail": lambda factory: create_random_email(factory=factory),
+    "AnyUrl": lambda factory: create_random_url(factory=factory),
+    "AnyHttpUrl": lambda factory: create_random_url(factory=factory),
+    "HttpUrl": lambda factory: create_random_url(factory=factory),
+}
+
+
+def map_type_to_data(type_: Any, factory: Optional[DataFactory] = None) -> Any:
+    return compile_type(type_)(factory)
+
+
+def collect_constraints(metadata: Iterable[Any]) -> Dict[str, Any]:
+    constraints: Dict[str, Any] = {}
+    for item in metadata:
+        # A pydantic Field inside Annotated keeps its constraints in its own metadata
+        if isinstance(item_metadata := getattr(item, "metadata", None), list):
+            constraints |= collect_constraints(item_metadata)
+        for name in CONSTRAINTS:
+            if (value := getattr(item, name, None)) is not None:
+                constraints[name] = value
+    return constraints
+
+
+def compile_type(
+    type_: Any,
+    constraints: Optional[Dict[str, Any]] = None,
+    fill_all_fields: bool = True,
+    compile_class: Optional[ClassCompiler] = None,
+) -> ValueGenerator:
+    """Build, once, a function that creates random values of the given type. The function only
+    receives the factory, so it can be cached and called as many times as needed.
+
+    Parameters
+    ----------
+        type_ : Any
+            A type, a typing annotation like Optional[List[int]] or the name of a builtin type
+
+        constraints : Optional[Dict[str, Any]]
+            Bounds for the values, like gt, le, min_length or max_length, by default None
+
+        fill_all_fields : bool
+            If False, Optional types always create None, by default True
+
+        compile_class : Optional[ClassCompiler]
+            Called with the classes that aren't known, like nested models. It returns their
+            generator or None to let the default one be used, by default None
+
+    Returns
+    -------
+        ValueGenerator
+            A function that takes an optional DataFactory and returns a random value
+    """
+    constraints = constraints or {}
+    if isinstance(type_, str):
+        type_ = TYPES_AS_STR.get(type_, type_)
+    origin, args = get_origin(type_), get_args(type_)
+
+    def compile_arg(arg: Any, arg_constraints: Optional[Dict[str, Any]] = None) -> ValueGenerator:
+        return compile_type(arg, arg_constraints, fill_all_fields, compile_class)
+
+    if origin is not None:
+        return _compile_generic(origin, args, constraints, fill_all_fields, compile_arg)
+    if type_ is type(None):
+        return lambda factory: None
+    if type_ is Any or type_ is object:
+        return lambda factory: create_random_string(factory=factory)
+    if isinstance(type_, type) and issubclass(type_, enum.Enum):
+        return _compile_choice(list(type_))
+    if type_ in SCALARS:
+        return SCALARS[type_](constraints)
+    if isinstance(type_, type) and type_ in COLLECTIONS:
+        return _compile_collection(type_, (), constraints, compile_arg)
+    if compile_class and isinstance(type_, type) and (generator := compile_class(type_)):
+        return generator
+    return CLASSES_BY_NAME.get(getattr(type_, "__name__", ""), lambda factory: None)
+
+
+def _compile_generic(
+    origin: Any,
+    args: tuple[Any, ...],
+    constraints: Dict[str, Any],
+    fill_all_fields: bool,
+    compile_arg: Callable[..., ValueGenerator],
+) -> ValueGenerator:
+    if origin is Annotated:
+        return compile_arg(args[0], constraints | collect_constraints(args[1:]))
+    if origin is Union or origin is types.UnionType:
+        options = [arg for arg in args if arg is not type(None)]
+        if not fill_all_fields and len(options) < len(args):
+            return lambda factory: None
+        generators, cycle = [], None
+        for arg in options:
+            try:
+                generators.append(compile_arg(arg, constraints))
+            except CyclicTypeError as error:
+                cycle = error
+        if generators:
+            return _compile_choice(generators, call=True)
+        if cycle and len(options) == len(args):
+            raise cycle
+        return lambda factory: None
+    if origin is Literal:
+        return _compile_choice(list(args))
+    return _compile_collection(origin, args, constraints, compile_arg)
+
+
+def _compile_choice(options: list[Any], call: bool = False) -> ValueGenerator:
+    if len(options) == 1:
+        return options[0] if call else lambda factory: options[0]
+    if call:
+        return lambda factory: options[int(get_rng(factory).integers(0, len(options)))](factory)
+    return lambda factory: options[int(get_rng(factory).integers(0, len(options)))]
+
+
+def _bounds(
+    constraints: Dict[str, Any],
+    step: float,
+) -> tuple[Optional[float], Optional[float]]:
+    low = _as_number(constraints.get("ge"))
+    if low is None and constraints.get("gt") is not None:
+        low = _as_number(constraints["gt"]) + step
+    high = _as_number(constraints.get("le"))
+    if high is None and constraints.get("lt") is not None:
+        high = _as_number(constraints["lt"]) - step
+    if low is None and high is None:
+        return None, None
+    if low is None:
+        low = high - MAX_VALUE  # type: ignore
+    if high is None:
+        high = max(low, 0) + MAX_VALUE
+    return low, high
+
+
+def _as_number(value: Any) -> Any:
+    # Decimal bounds can't be added to the float steps
+    return float(value) if isinstance(value, decimal.Decimal) else value
+
+
+def _compile_int(constraints: Dict[str, Any]) -> ValueGenerator:
+    low, high = _bounds(constraints, 1)
+    multiple_of = constraints.get("multiple_of") or 1
+    if low is None:
+        if multiple_of == 1:
+            return lambda factory: create_random_integer(factory=factory)
+        low, high = -MAX_VALUE, MAX_VALUE
+    low, high = -(-int(low) // multiple_of), int(high) // multiple_of  # type: ignore
+    return lambda factory: int(get_rng(factory).integers(low, high, endpoint=True)) * multiple_of
+
+
+def _compile_float(constraints: Dict[str, Any]) -> ValueGenerator:
+    low, high = _bounds(constraints, 1e-9)
+    if low is None or high is None:
+        return lambda factory: create_random_float(factory=factory)
+    return lambda factory: float(get_rng(factory).uniform(low, high))
+
+
+def _compile_decimal(constraints: Dict[str, Any]) -> ValueGenerator:
+    decimal_places = constraints.get("decimal_places", 2)
+    scale = 10**decimal_places
+    low, high = _bounds(constraints, 1 / scale)
+    if max_digits := constraints.get("max_digits"):
+        # The digits only bound the sides that the other constraints leave looser
+        limit = 10 ** (max_digits - decimal_places) - 1
+        low = -limit if low is None else max(low, -limit)
+        high = limit if high is None else min(high, limit)
+    if low is None or high is None:
+        generate_float = _compile_float({})
+    else:
+        # With both bounds on the grid of decimal_places, rounding can't leave them
+        low, high = math.ceil(low * scale - 1e-6) / scale, math.floor(high * scale + 1e-6) / scale
+        generate_float = _compile_float({"ge": low, "le": high})
+    return lambda factory: round(decimal.Decimal(str(generate_float(factory))), decimal_places)
+
+
+def _compile_str(constraints: Dict[str, Any]) -> ValueGenerator:
+    min_length = constraints.get("min_length")
+    max_length = constraints.get("max_length")
+    if min_length is None:
+        if max_length is None:
+            return lambda factory: create_random_string(factory=factory)
+        limit: int = max_length
+        return lambda factory: create_random_string(limit, factory=factory)
+    max_length = max_length if max_length is not None else min_length + 50
+
+    def generate(factory: Optional[DataFactory]) -> str:
+        length = int(get_rng(factory).integers(min_length, max_length, endpoint=True))
+        return create_random_string(max_length, factory=factory)[:length].ljust(length, "x")
+
+    return generate
+
+
+def _compile_bytes(constraints: Dict[str, Any]) -> ValueGenerator:
+    generate_str = _compile_str(constraints)
+    return lambda factory: generate_str(factory).encode()
+
+
+def _compile_timedelta(constraints: Dict[str, Any]) -> ValueGenerator:
+    return lambda factory: datetime.timedelta(
+        seconds=int(get_rng(factory).integers(0, 60 * 60 * 24 * 365))
+    )
+
+
+SCALARS: Dict[Any, Callable[[Dict[str, Any]], ValueGenerator]] = {
+    int: _compile_int,
+    float: _compile_float,
+    decimal.Decimal: _compile_decimal,
+    complex: lambda constraints: lambda factory: complex(
+        create_random_float(factory=factory),
+        create_random_float(factory=factory),
+    ),
+    str: _compile_str,
+    bytes: _compile_bytes,
+    bytearray: lambda constraints: lambda factory: bytearray(_compile_bytes(constraints)(factory)),
+    bool: lambda constraints: lambda factory: create_random_bool(factory=factory),
+    datetime.datetime: lambda constraints: lambda factory: create_random_datetime(factory=factory),
+    datetime.date: lambda constraints: lambda factory: create_random_date(factory=factory),
+    datetime.time: lambda constraints: lambda factory: create_random_hour(factory=factory),
+    datetime.timedelta: _compile_timedelta,
+    uuid.UUID: lambda constraints: lambda factory: create_random_uuid(factory=factory),
+}
+
+COLLECTIONS: Dict[Any, Callable[[Iterable[Any]], Any]] = {
+    list: list,
+    set: set,
+    frozenset: frozenset,
+    tuple: tuple,
+    collections.abc.Sequence: list,
+    collections.abc.MutableSequence: list,
+    collections.abc.Iterable: list,
+    collections.abc.Set: set,
+    collections.abc.MutableSet: set,
+    dict: dict,
+    collections.abc.Mapping: dict,
+    collections.abc.MutableMapping: dict,
+}
+
+MAPPINGS = (dict, collections.abc.Mapping, collections.abc.MutableMapping)
+
+
+def _compile_collection(
+    origin: Any,
+    args: tuple[Any, ...],
+    constraints: Dict[str, Any],
+    compile_arg: Callable[..., ValueGenerator],
+) -> ValueGenerator:
+    cast_to = COLLECTIONS.get(origin, list)
+    if origin is tuple and args and args[-1] is not Ellipsis:
+        items = [compile_arg(arg) for arg in args]
+        return lambda factory: tuple(item(factory) for item in items)
+    min_length = constraints.get("min_length", 1)
+    max_length = constraints.get("max_length", max(min_length, MAX_ITEMS))
+
+    def length(factory: Optional[DataFactory]) -> int:
+        return int(get_rng(factory).integers(min_length, max_length, endpoint=True))
+
+    if origin in MAPPINGS:
+        key, value = (compile_arg(arg) for arg in args or (str, Any))
+        return lambda factory: {key(factory): value(factory) for _ in range(length(factory))}
+    item = compile_arg(args[0] if args else Any)
+    return lambda factory: cast_to(item(factory) for _ in range(length(factory)))
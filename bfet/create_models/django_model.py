@@ -1,28 +1,96 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Type, TypeVar
+from functools import reduce
+from operator import or_
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type, TypeVar
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
 
 from ..create_data.create_data import (
-    create_random_bool,
-    create_random_date,
-    create_random_datetime,
-    create_random_email,
-    create_random_float,
-    create_random_hour,
-    create_random_integer,
-    create_random_json,
-    create_random_positive_integer,
-    create_random_slug,
-    create_random_string,
-    create_random_text,
-    create_random_url,
-    create_random_uuid,
+    _as_list,
+    create_random_bools,
+    create_random_dates,
+    create_random_datetimes,
+    create_random_emails,
+    create_random_floats,
+    create_random_hours,
+    create_random_integers,
+    create_random_jsons,
+    create_random_positive_integers,
+    create_random_slugs,
+    create_random_strings,
+    create_random_texts,
+    create_random_urls,
+    create_random_uuids,
 )
+from ..create_data.data_factory import DataFactory, get_rng
 
 T = TypeVar("T")
 
 
+def _return_none_by_now(n: int, **extra_params) -> List[None]:
+    return [None] * n
+
+
+# BigIntegerField (min_value=10000)
+# PositiveBigIntegerField (min_value=10000)
+DATA_GENERATORS: Dict[str, Callable[..., Any]] = {
+    "DateTimeField": create_random_datetimes,
+    "DateField": create_random_dates,
+    "TimeField": create_random_hours,
+    # "DurationField": DjangoTestingModel.create(),
+    # "AutoField": DjangoTestingModel.create(),
+    # "BigAutoField": DjangoTestingModel.create(),
+    # "SmallAutoField": DjangoTestingModel.create(),
+    # "BinaryField": DjangoTestingModel.create(),
+    # "CommaSeparatedIntegerField": DjangoTestingModel.create(),
+    "DecimalField": create_random_floats,
+    "FloatField": create_random_floats,
+    "BigIntegerField": create_random_integers,
+    "PositiveBigIntegerField": create_random_positive_integers,
+    "PositiveIntegerField": create_random_positive_integers,
+    "PositiveSmallIntegerField": create_random_positive_integers,
+    "IntegerField": create_random_integers,
+    "SmallIntegerField": create_random_integers,
+    "CharField": create_random_strings,
+    "TextField": create_random_texts,
+    "SlugField": create_random_slugs,
+    "URLField": create_random_urls,
+    "UUIDField": create_random_uuids,
+    "EmailField": create_random_emails,
+    # "Empty": DjangoTestingModel.create(),
+    # "Field": DjangoTestingModel.create(),
+    # "NOT_PROVIDED": DjangoTestingModel.create(),
+    # "FilePathField": DjangoTestingModel.create(),
+    "FileField": _return_none_by_now,
+    "ImageField": _return_none_by_now,
+    "JSONField": create_random_jsons,
+    # "GenericIPAddressField": DjangoTestingModel.create(),
+    # "IPAddressField": DjangoTestingModel.create(),
+    "BooleanField": create_random_bools,
+    "NullBooleanField": create_random_bools,
+    "ForeignKey": _return_none_by_now,
+    "OneToOneField": _return_none_by_now,
+    "ManyToManyField": _return_none_by_now,
+}
+
+
+class FieldPlan(NamedTuple):
+    name: str
+    null: bool
+    generator: Callable[..., Any]
+    extra_params: Dict[str, Any]
+    related_model: Optional[Type] = None
+    unique: bool = False
+    attname: str = ""
+
+
 class DjangoTestingModel:
+    _field_plans: Dict[Type, Tuple[FieldPlan, ...]] = {}
+
     def __init__(
         self,
         model,
@@ -30,12 +98,20 @@ class DjangoTestingModel:
         in_bulk: bool,
         fill_all_fields: bool,
         force_create: bool,
+        factory: Optional[DataFactory] = None,
+        batch_size: Optional[int] = None,
+        related_pool_size: int = 0,
+        ancestors: Tuple[Type, ...] = (),
     ) -> None:
         self.model = model
         self.quantity = quantity
         self.in_bulk = in_bulk
         self.fill_all_fields = fill_all_fields
         self.force_create = force_create
+        self.factory = factory
+        self.batch_size = batch_size
+        self.related_pool_size = related_pool_size
+        self.ancestors = ancestors
 
     @classmethod
     def create(
@@ -43,6 +119,8 @@ class DjangoTestingModel:
         model: Type[T],
         fill_all_fields: bool = True,
         force_create: bool = False,
+        factory: Optional[DataFactory] = None,
+        related_pool_size: int = 0,
         **kwargs: Any,
     ) -> T:
         """The method to call when we want to create one or more instances
@@ -60,6 +138,15 @@ class DjangoTestingModel:
                 Boolean to indicate, if any field is manually filled, it has to perform
                 a get_or_create instead of create, by default False
 
+            factory : Optional[DataFactory]
+                The factory whose random generator is used to create the values, so the same seed
+                creates the same instances, by default None
+
+            related_pool_size : int
+                How many existing instances of each related model can be reused for the
+                foreign keys and many to many fields. If 0, new related instances are created,
+                by default 0
+
             kwargs
                 Fields of the model that we want to manually fill
 
@@ -74,6 +161,8 @@ class DjangoTestingModel:
             in_bulk=False,
             fill_all_fields=fill_all_fields,
             force_create=force_create,
+            factory=factory,
+            related_pool_size=related_pool_size,
         )._create_model(**kwargs)
 
     @classmethod
@@ -84,6 +173,9 @@ class DjangoTestingModel:
         in_bulk: bool = False,
         fill_all_fields: bool = True,
         force_create: bool = False,
+        factory: Optional[DataFactory] = None,
+        batch_size: Optional[int] = None,
+        related_pool_size: int = 0,
         **kwargs,
     ) -> List[T]:
         """The method to call when we want to create one or more instances
@@ -100,7 +192,9 @@ class DjangoTestingModel:
                 The number of instances that we want to create, by default 2
 
             in_bulk : bool
-                Boolean to use the bulk_create built-in of Django, by default False
+                Boolean to create all the instances at once. The values are created up front,
+                the manually filled fields are looked up with a single query and the missing
+                instances are inserted with bulk_create in one transaction, by default False
 
             fill_all_fields : bool
                 Boolean to tell if all the fields must be filled or it's better to leave them blank
@@ -110,6 +204,20 @@ class DjangoTestingModel:
                 Boolean to indicate, if any field is manually filled, it has to perform
                 a get_or_create instead of create, by default False
 
+            factory : Optional[DataFactory]
+                The factory whose random generator is used to create the values, so the same seed
+                creates the same instances, by default None
+
+            batch_size : Optional[int]
+                The maximum number of instances inserted per query when in_bulk is True,
+                by default None
+
+            related_pool_size : int
+                How many instances of each related model are shared by all the new instances for
+                the foreign keys and many to many fields. Existing ones are reused first and the
+                rest are created in bulk, one query per level of relations. If 0, each instance
+                gets its own new related instances, by default 0
+
             kwargs
                 Fields of the model that we want to manually fill
 
@@ -125,6 +233,9 @@ class DjangoTestingModel:
                 in_bulk,
                 fill_all_fields,
                 force_create,
+                factory,
+                batch_size,
+                related_pool_size,
             )._create_in_bulk(**kwargs)
         return [
             cls(
@@ -133,6 +244,8 @@ class DjangoTestingModel:
                 in_bulk,
                 fill_all_fields,
                 force_create,
+                factory,
+                related_pool_size=related_pool_size,
             )._create_model(**kwargs)
             for _ in range(quantity)
         ]
@@ -144,46 +257,124 @@ class DjangoTestingModel:
             manager = self.model.objects
         return manager
 
-    def _create_in_bulk(self, **kwargs) -> Any:
-        pre_objects = [
-            self.model(
-                **self._inspect_model(**kwargs),
-            )
-            for _ in range(self.quantity)
+    def _create_in_bulk(self, **kwargs) -> List[Any]:
+        rows = self._generate_rows(self.quantity, **kwargs)
+        model_manager = self._get_model_manager()
+        lookup_fields = [name for name in kwargs if rows and name in rows[0]]
+        with transaction.atomic(using=model_manager.db):
+            if self.force_create or not lookup_fields:
+                instances = model_manager.bulk_create(
+                    [self.model(**row) for row in rows],
+                    batch_size=self.batch_size,
+                )
+                self._link_many_to_many(instances)
+                return instances
+            return self._get_or_create_in_bulk(rows, lookup_fields)
+
+    def _get_or_create_in_bulk(
+        self,
+        rows: List[Dict[str, Any]],
+        lookup_fields: List[str],
+    ) -> List[Any]:
+        model_manager = self._get_model_manager()
+        # The relations are compared by their column, like fk_id, so no related instance is
+        # fetched and a given instance matches its primary key
+        attnames = [self._get_attname(name) for name in lookup_fields]
+        keys = [
+            tuple(getattr(row[name], "pk", row[name]) for name in lookup_fields) for row in rows
         ]
-        return self._get_model_manager().bulk_create(pre_objects)
+        unique_keys = dict.fromkeys(keys)
+        if len(attnames) == 1:
+            query = Q(**{f"{attnames[0]}__in": [key[0] for key in unique_keys]})
+        else:
+            query = reduce(or_, (Q(**dict(zip(attnames, key))) for key in unique_keys))
+        instances = {
+            tuple(getattr(instance, attname) for attname in attnames): instance
+            for instance in model_manager.filter(query)
+        }
+        missing_rows = {key: row for key, row in zip(keys, rows) if key not in instances}
+        created = model_manager.bulk_create(
+            [self.model(**row) for row in missing_rows.values()],
+            batch_size=self.batch_size,
+        )
+        self._link_many_to_many(created)
+        instances |= dict(zip(missing_rows, created))
+        return [instances[key] for key in keys]
+
+    def _get_attname(self, name: str) -> str:
+        try:
+            return self.model._meta.get_field(name).attname
+        except (FieldDoesNotExist, AttributeError):
+            return name
 
     def _create_model(self, **kwargs) -> Any:
-        model_data = self._inspect_model(**kwargs)
         model_manager = self._get_model_manager()
+        if not self.force_create and model_manager.filter(**kwargs).exists():
+            return model_manager.filter(**kwargs).first()
+        model_data = self._inspect_model(**kwargs)
         if self.force_create:
             kwargs |= model_data
-            model = model_manager.create(**kwargs)
-        elif model_manager.filter(**kwargs).exists():
-            model = model_manager.filter(**kwargs).first()
+            model, created = model_manager.create(**kwargs), True
         else:
-            model, _ = model_manager.get_or_create(
+            model, created = model_manager.get_or_create(
                 **kwargs,
                 defaults=model_data,
             )
+        if created:
+            self._link_many_to_many([model])
         return model
 
+    @classmethod
+    def invalidate_field_plans(cls, model: Optional[Type] = None) -> None:
+        """Forget the compiled field plans, so they are built again from the model's fields.
+        Call it after altering a model, for example in a test that adds or changes fields.
+
+        Parameters
+        ----------
+            model : Optional[Type]
+                The model whose plan must be removed. If None, all the plans are removed,
+                by default None
+        """
+        if model is None:
+            cls._field_plans.clear()
+        else:
+            cls._field_plans.pop(model, None)
+
+    def _get_field_plans(self) -> Tuple[FieldPlan, ...]:
+        try:
+            return self._field_plans[self.model]
+        except KeyError:
+            plans = tuple(
+                self._compile_field(field)
+                for field in self.model._meta.fields
+                if field.name != "id"
+            )
+            self._field_plans[self.model] = plans
+            return plans
+
     def _inspect_model(self, **kwargs) -> Dict:
-        fields_info = {}
-        for field in self.model._meta.fields:
-            field_name = field.name
-            if field_name == "id":
+        return self._generate_rows(1, **kwargs)[0]
+
+    def _generate_rows(self, quantity: int, **kwargs) -> List[Dict[str, Any]]:
+        # The manually filled fields are kept as they are, like id or fk_id, but not the lookups
+        columns = {
+            name: [value] * quantity for name, value in kwargs.items() if LOOKUP_SEP not in name
+        }
+        for plan in self._get_field_plans():
+            if plan.name in kwargs or plan.attname in kwargs:
                 continue
-            if field_name in kwargs:
-                fields_info[field_name] = kwargs.pop(field_name)
+            if not self.fill_all_fields and plan.null:
+                columns[plan.name] = [None] * quantity
+            elif plan.related_model is not None:
+                columns[plan.name] = self._get_related_instances(plan, quantity)
             else:
-                if not self.fill_all_fields and field.__dict__.get("null"):
-                    fields_info[field_name] = None
-                    continue
-
-                fields_info |= self._inspect_field(field, field_name)
-
-        return fields_info
+                columns[plan.name] = _as_list(
+                    plan.generator(quantity, factory=self.factory, **plan.extra_params)
+                )
+        if not columns:
+            # A model with only an id still has its rows
+            return [{} for _ in range(quantity)]
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
 
     @staticmethod
     def _set_max_value(max_length: Optional[int | float]) -> int:
@@ -194,65 +385,76 @@ class DjangoTestingModel:
             max_length = max_length / 10
         return int(max_length)
 
-    def _inspect_field(self, field: Type, field_name: str) -> Dict[str, Any]:
+    def _compile_field(self, field: Type) -> FieldPlan:
         field_info = field.__dict__
         extra_params = {}
         if max_lenght := field_info.get("max_length"):
-            extra_params = {"max_value": self._set_max_value(max_lenght)}
-        return {
-            field_name: self._generate_random_data_per_field(
-                field.get_internal_type(),
-                extra_params,
-            )
-        }
+            extra_params["max_value"] = self._set_max_value(max_lenght)
+        return FieldPlan(
+            name=field.name,
+            null=bool(field_info.get("null")),
+            generator=DATA_GENERATORS[field.get_internal_type()],
+            extra_params=extra_params,
+            related_model=field.related_model if field.is_relation else None,
+            unique=field.unique,
+            attname=field.attname,
+        )
 
-    def _generate_random_data_per_field(
-        self,
-        field_type: str,
-        extra_params: Dict,
-    ):
-        # BigIntegerField (min_value=10000)
-        # PositiveBigIntegerField (min_value=10000)
-        data_generator = {
-            "DateTimeField": create_random_datetime,
-            "DateField": create_random_date,
-            "TimeField": create_random_hour,
-            # "DurationField": DjangoTestingModel.create(),
-            # "AutoField": DjangoTestingModel.create(),
-            # "BigAutoField": DjangoTestingModel.create(),
-            # "SmallAutoField": DjangoTestingModel.create(),
-            # "BinaryField": DjangoTestingModel.create(),
-            # "CommaSeparatedIntegerField": DjangoTestingModel.create(),
-            "DecimalField": create_random_float,
-            "FloatField": create_random_float,
-            "BigIntegerField": create_random_integer,
-            "PositiveBigIntegerField": create_random_positive_integer,
-            "PositiveIntegerField": create_random_positive_integer,
-            "PositiveSmallIntegerField": create_random_positive_integer,
-            "IntegerField": create_random_integer,
-            "SmallIntegerField": create_random_integer,
-            "CharField": create_random_string,
-            "TextField": create_random_text,
-            "SlugField": create_random_slug,
-            "URLField": create_random_url,
-            "UUIDField": create_random_uuid,
-            "EmailField": create_random_email,
-            # "Empty": DjangoTestingModel.create(),
-            # "Field": DjangoTestingModel.create(),
-            # "NOT_PROVIDED": DjangoTestingModel.create(),
-            # "FilePathField": DjangoTestingModel.create(),
-            "FileField": self._return_none_by_now,
-            "ImageField": self._return_none_by_now,
-            "JSONField": create_random_json,
-            # "GenericIPAddressField": DjangoTestingModel.create(),
-            # "IPAddressField": DjangoTestingModel.create(),
-            "BooleanField": create_random_bool,
-            "NullBooleanField": create_random_bool,
-            "ForeignKey": self._return_none_by_now,
-            "OneToOneField": self._return_none_by_now,
-            "ManyToManyField": self._return_none_by_now,
-        }
-        return data_generator[field_type](**extra_params)  # type: ignore
+    def _create_related(self, related_model: Type, quantity: int) -> List[Any]:
+        return DjangoTestingModel(
+            related_model,
+            quantity,
+            True,
+            self.fill_all_fields,
+            True,
+            self.factory,
+            self.batch_size,
+            self.related_pool_size,
+            self.ancestors + (self.model,),
+        )._create_in_bulk()
 
-    def _return_none_by_now(self, **extra_params):
+    def _get_related_pool(self, related_model: Type, size: int) -> List[Any]:
+        pool = list(related_model._default_manager.all()[:size])
+        if missing := size - len(pool):
+            pool += self._create_related(related_model, missing)
+        return pool
+
+    def _get_related_instances(self, plan: FieldPlan, quantity: int) -> List[Any]:
+        related_model = plan.related_model
+        if related_model is None:
+            return [None] * quantity
+        if related_model in self.ancestors + (self.model,):
+            if plan.null:
+                return [None] * quantity
+            raise ValueError(
+                f"{self.model.__name__}.{plan.name} is a required circular relation and"
+                " it must be filled manually"
+            )
+        if plan.unique or not self.related_pool_size:
+            return self._create_related(related_model, quantity)
+        pool = self._get_related_pool(related_model, min(self.related_pool_size, quantity))
+        return [pool[i] for i in get_rng(self.factory).integers(0, len(pool), size=quantity)]
+
+    def _link_many_to_many(self, instances: List[Any]) -> None:
+        instances = [instance for instance in instances if instance.pk is not None]
+        if not self.fill_all_fields or not instances:
+            return None
+        for field in self.model._meta.many_to_many:
+            through = field.remote_field.through
+            if not through._meta.auto_created:
+                continue
+            related_instances = self._get_related_instances(
+                FieldPlan(field.name, True, _return_none_by_now, {}, field.related_model),
+                len(instances),
+            )
+            source = through._meta.get_field(field.m2m_field_name()).attname
+            target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+            through._default_manager.bulk_create(
+                [
+                    through(**{source: instance.pk, target: related_instance.pk})
+                    for instance, related_instance in zip(instances, related_instances)
+                    if related_instance is not None
+                ],
+                batch_size=self.batch_size,
+            )
         return None
@@ -1,23 +1,61 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple, Type
+from enum import Enum
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, Type
 
 from pydantic import BaseModel
 from pydantic.fields import FieldInfo
+from pydantic_core import to_json
 
-from ..create_data.map_types.type_to_data import map_type_to_data
+from ..create_data.data_factory import DataFactory, get_rng
+from ..create_data.map_types.type_to_data import (
+    CyclicTypeError,
+    ValueGenerator,
+    collect_constraints,
+    compile_type,
+)
 
 T = BaseModel
 # T = TypeVar("T")
 
 
+class FieldPlan(NamedTuple):
+    name: str
+    key: str
+    generator: ValueGenerator
+
+
+class OutputFormat(Enum):
+    MODEL = "MODEL"
+    DICT = "DICT"
+    JSON = "JSON"
+
+
 class PydanticTestingModel:
-    def __init__(self, model: Type[T], fill_all_fields: bool) -> None:
+    _field_plans: Dict[Tuple[Type[T], bool], Tuple[FieldPlan, ...]] = {}
+    # The models being compiled, in order, and whether their plans can be cached
+    _compiling: Dict[Tuple[Type[T], bool], bool] = {}
+    # The models whose plans cut a cycle back to themselves, so they only hold on their own
+    _cyclic: Set[Tuple[Type[T], bool]] = set()
+
+    def __init__(
+        self,
+        model: Type[T],
+        fill_all_fields: bool,
+        factory: Optional[DataFactory] = None,
+    ) -> None:
         self.model: Type[T] = model
         self.fill_all_fields = fill_all_fields
+        self.factory = factory
 
     @classmethod
-    def create(cls, model: Type[T], fill_all_fields: bool = False, **kwargs: Any) -> T:
+    def create(
+        cls,
+        model: Type[T],
+        fill_all_fields: bool = False,
+        factory: Optional[DataFactory] = None,
+        **kwargs: Any,
+    ) -> T:
         """The method to call when we want to create one or more instances
         TODO
         Create and raise an error if in_bulk or quantity > 1 and force_create is set to True
@@ -32,6 +70,10 @@ class PydanticTestingModel:
                 Boolean to tell if all the fields must be filled or it's better to leave them blank
                 (if possible), by default False
 
+            factory : Optional[DataFactory]
+                The factory whose random generator is used to create the values, so the same seed
+                creates the same instances, by default None
+
             kwargs
                 Fields of the model that we want to manually fill
 
@@ -40,7 +82,7 @@ class PydanticTestingModel:
             T
                 An object with the passed model
         """
-        return cls(model, fill_all_fields)._create_model(kwargs)
+        return cls(model, fill_all_fields, factory)._create_model(kwargs)
 
     @classmethod
     def create_many(
@@ -48,8 +90,11 @@ class PydanticTestingModel:
         model: Type[T],
         fill_all_fields: bool = False,
         number_of_models: int = 2,
+        factory: Optional[DataFactory] = None,
+        validation_fraction: float = 1.0,
+        output: OutputFormat = OutputFormat.MODEL,
         **kwargs,
-    ) -> List[T]:
+    ) -> List[Any]:
         """The method to call when we want to create more than one instance
 
         Parameters
@@ -64,34 +109,149 @@ class PydanticTestingModel:
                 Boolean to tell if all the fields must be filled or it's better to leave them blank
                 (if possible), by default False
 
+            factory : Optional[DataFactory]
+                The factory whose random generator is used to create the values, so the same seed
+                creates the same instances, by default None
+
+            validation_fraction : float
+                The fraction of the instances that go through the model's validation. The rest are
+                built with model_construct, which trusts the generated data. With 0 no instance
+                is validated, by default 1.0
+
+            output : OutputFormat
+                MODEL returns the instances, DICT their model_dump and JSON their serialization as
+                bytes. The keys are the aliases of the fields, by default OutputFormat.MODEL
+
             kwargs
                 Fields of the model that we want to manually fill
 
         Returns
         -------
-            List[T]
-                A list of models
+            List[Any]
+                A list of models, dicts or JSON bytes
+        """
+        creator = cls(model, fill_all_fields, factory)
+        if validation_fraction >= 1 and output == OutputFormat.MODEL:
+            return [creator._create_model(kwargs) for _ in range(number_of_models)]
+        return [
+            creator._create_output(kwargs, validation_fraction, output)
+            for _ in range(number_of_models)
+        ]
+
+    @classmethod
+    def invalidate_field_plans(cls, model: Optional[Type[T]] = None) -> None:
+        """Forget the compiled field plans, so they are built again from the model's fields
+
+        Parameters
+        ----------
+            model : Optional[Type[T]]
+                The model whose plans must be removed. If None, all the plans are removed,
+                by default None
         """
-        creator = cls(model, fill_all_fields)
-        return [creator._create_model(kwargs) for _ in range(number_of_models)]
+        for key in list(cls._field_plans):
+            if model is None or key[0] is model:
+                del cls._field_plans[key]
+                cls._cyclic.discard(key)
+
+    def _get_field_plans(self) -> Tuple[FieldPlan, ...]:
+        key = (self.model, self.fill_all_fields)
+        if key in self._field_plans and not (self._compiling and key in self._cyclic):
+            return self._field_plans[key]
+        if key in self._compiling:
+            # The models compiled inside this one only cut the cycle for this one, so their
+            # plans don't hold when they are created on their own
+            compiling = list(self._compiling)
+            for inner in compiling[compiling.index(key) + 1 :]:
+                self._compiling[inner] = False
+            self._cyclic.add(key)
+            raise CyclicTypeError(f"{self.model.__name__} contains itself without an Optional")
+        self._compiling[key] = True
+        try:
+            plans = tuple(
+                FieldPlan(name, info.alias or name, self._compile_field(info))
+                for name, info in self.model.model_fields.items()
+            )
+        finally:
+            cacheable = self._compiling.pop(key)
+        if cacheable:
+            self._field_plans[key] = plans
+        return plans
 
     def _create_model(self, kwargs: Dict[str, Any]) -> T:
-        fields = self.model.model_fields.items()
-        data = dict(self._create_field(name, info, kwargs.get(name)) for name, info in fields)
-        return self.model(**data)
+        return self.model(**self._create_data(kwargs))
+
+    def _construct_model(self, kwargs: Dict[str, Any]) -> T:
+        data = {
+            plan.key: (
+                kwargs[plan.name]
+                if plan.name in kwargs
+                else _construct(plan.generator(self.factory))
+            )
+            for plan in self._get_field_plans()
+        }
+        return self.model.model_construct(**data)
 
-    def _create_field(
+    def _create_output(
         self,
-        name: str,
-        info: FieldInfo,
-        default_data: Optional[Any],
-    ) -> Tuple[str, Any]:
-        return info.alias or name, default_data or self._inspect_field(info)
-
-    def _inspect_field(self, info: FieldInfo) -> Any:
-        if info.default_factory:
-            return info.default_factory()
-        return info.default or self._get_field_type_data(str(info.annotation))
-
-    def _get_field_type_data(self, field_type: str) -> Dict:
-        return map_type_to_data(field_type)
+        kwargs: Dict[str, Any],
+        validation_fraction: float,
+        output: OutputFormat,
+    ) -> Any:
+        if validation_fraction >= 1 or (
+            validation_fraction > 0 and get_rng(self.factory).random() < validation_fraction
+        ):
+            instance = self._create_model(kwargs)
+        else:
+            instance = self._construct_model(kwargs)
+        if output == OutputFormat.DICT:
+            return instance.model_dump(by_alias=True)
+        if output == OutputFormat.JSON:
+            return to_json(instance, by_alias=True)
+        return instance
+
+    def _create_data(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            plan.key: kwargs[plan.name] if plan.name in kwargs else plan.generator(self.factory)
+            for plan in self._get_field_plans()
+        }
+
+    def _compile_field(self, info: FieldInfo) -> ValueGenerator:
+        if not self.fill_all_fields and not info.is_required():
+            if default_factory := info.default_factory:
+                return lambda factory: default_factory()  # type: ignore
+            return lambda factory: info.default
+        return compile_type(
+            info.annotation,
+            collect_constraints(info.metadata),
+            self.fill_all_fields,
+            self._compile_class,
+        )
+
+    def _compile_class(self, type_: type) -> Optional[ValueGenerator]:
+        if not issubclass(type_, BaseModel):
+            return None
+        plans = PydanticTestingModel(type_, self.fill_all_fields)._get_field_plans()
+
+        # The nested data is validated with its parent, or constructed with it by _construct
+        def create_nested_data(factory: Optional[DataFactory]) -> _ModelData:
+            return _ModelData(type_, {plan.key: plan.generator(factory) for plan in plans})
+
+        return create_nested_data
+
+
+class _ModelData(dict):
+    """The data generated for a nested model, kept as a dict so the parent validates it"""
+
+    def __init__(self, model: Type[T], data: Dict[str, Any]) -> None:
+        super().__init__(data)
+        self.model = model
+
+
+def _construct(value: Any) -> Any:
+    if isinstance(value, _ModelData):
+        return value.model.model_construct(**{key: _construct(item) for key, item in value.items()})
+    if isinstance(value, dict):
+        return {key: _construct(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_construct(item) for item in value)
+    return value
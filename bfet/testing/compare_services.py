@@ -1,104 +1,693 @@
 from __future__ import annotations
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import asyncio
+from collections import Counter, deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
 from datetime import datetime
+import hashlib
+from itertools import count, islice, repeat
+import json
+import math
 import pprint as pp
-from statistics import mean, median, stdev
+import threading
 import time
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from deepdiff import DeepDiff
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 import urllib3
 
+from ..create_data.data_factory import DataFactory, get_rng
+from .corpus import CorpusRequest, read_corpus
+from .histogram import LatencyHistogram
+from .http_clients import AsyncClient, get_async_client
+from .regression import RegressionReport, check_regression
+
 # Suppress all InsecureRequestWarning warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+DEFAULT_REQUEST = CorpusRequest()
+# Each endpoint has its own histogram, the ones after the first MAX_ENDPOINTS share one
+MAX_ENDPOINTS = 100
+OTHER_ENDPOINTS = "other endpoints"
+
 
 class ServiceRequest(NamedTuple):
     start_datetime: datetime
     execution_time: float
-    response: Any
+    status_code: int = 0
+    size: int = 0
+    body_hash: str = ""
+    body: Optional[bytes] = None
+    cold: bool = False
+    endpoint: str = ""
 
 
-class Service:
-    results: List[Tuple[int, ServiceRequest]] = []
-    execution_times: List[float] = []
+def _summarize(
+    start_datetime: datetime,
+    execution_time: float,
+    response: Any,
+    cold: bool,
+    endpoint: str = "",
+) -> ServiceRequest:
+    content = response.content or b""
+    return ServiceRequest(
+        start_datetime=start_datetime,
+        execution_time=execution_time,
+        status_code=response.status_code,
+        size=len(content),
+        body_hash=hashlib.blake2b(content, digest_size=16).hexdigest(),
+        body=content,
+        cold=cold,
+        endpoint=endpoint,
+    )
+
+
+@dataclass(frozen=True)
+class RateProfile:
+    """The pace at which the requests are sent, whatever the time the service takes to answer.
+    The rate changes linearly from rate to final_rate, if given, during the duration."""
+
+    rate: float
+    duration: float
+    final_rate: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        if self.rate <= 0 or self.duration <= 0:
+            raise ValueError("The rate and the duration should be > 0")
+        if self.final_rate is not None and self.final_rate < 0:
+            raise ValueError("The final_rate should be >= 0")
+
+    @property
+    def mean_rate(self) -> float:
+        final_rate = self.rate if self.final_rate is None else self.final_rate
+        return (self.rate + final_rate) / 2
+
+    @property
+    def number_of_requests(self) -> int:
+        return math.ceil(self.mean_rate * self.duration)
+
+    def send_times(self) -> Iterator[float]:
+        """Yield the second, since the start, at which each request must be sent. It's the time
+        at which the number of requests expected by the rate reaches the index of the request."""
+        acceleration = (self.mean_rate - self.rate) / self.duration
+        yield 0.0
+        for i in range(1, self.number_of_requests):
+            yield 2 * i / (self.rate + math.sqrt(self.rate**2 + 4 * acceleration * i))
+
 
+class Service:
     def __init__(
         self,
         url: str,
         name: str = "",
         headers: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
-        number_of_requests: int = 1,
+        number_of_requests: Optional[int] = 1,
         verify: bool = False,
+        concurrency: int = 100,
+        client: str = "",
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        max_results: Optional[int] = None,
+        body_sample_rate: float = 0.01,
+        corpus: Optional[str] = None,
+        warmup: int = 0,
     ):
+        """A service whose response times are measured
+
+        Parameters
+        ----------
+            url : str
+                The url to request
+
+            name : str
+                The name shown with the results. If empty, the last part of the url is used,
+                by default ""
+
+            headers : Optional[Dict[str, Any]]
+                The headers sent with each request, by default None
+
+            params : Optional[Dict[str, Any]]
+                The query parameters sent with each request, by default None
+
+            number_of_requests : Optional[int]
+                The number of requests to perform. With a corpus, None replays all of its
+                requests, by default 1
+
+            verify : bool
+                Verify the certificates of https urls, by default False
+
+            concurrency : int
+                The maximum number of requests in flight when requesting concurrently or
+                asynchronously, by default 100
+
+            client : str
+                The client used by the asynchronous requests, one of aiohttp, httpx or asyncio.
+                If empty, the first one installed is used, by default ""
+
+            pool_size : int
+                The number of connections kept by the session of each thread, by default 10
+
+            keep_alive : bool
+                Reuse the connections between requests. If False, every request opens a new
+                connection and is measured as cold, by default True
+
+            max_results : Optional[int]
+                The number of results kept, the oldest ones are dropped first. The execution
+                times are always counted. If None, all of them are kept, by default None
+
+            body_sample_rate : float
+                The fraction of the results that keep the full body of the response, the others
+                only keep its size and hash. The same request indexes are kept by every service,
+                by default 0.01
+
+            corpus : Optional[str]
+                A JSONL or HAR file with the requests to replay, read while they are sent. Their
+                paths are added to the url and their headers and params to the service's ones.
+                The execution times are also counted by endpoint, up to MAX_ENDPOINTS of them,
+                by default None
+
+            warmup : int
+                The number of requests sent, one after the other, before the measured ones to
+                warm up the service. They are neither measured nor compared, by default 0
+        """
         self.url = url
         self.name = name or url.split("/")[-1]
         self.headers = headers
         self.params = params
         self.number_of_requests = number_of_requests
         self.verify = verify
+        self.concurrency = concurrency
+        self.client = client
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.body_sample_rate = body_sample_rate
+        self.corpus = corpus
+        self.warmup = warmup
+        self.endpoint_histograms: Dict[str, LatencyHistogram] = {}
+        self.results: Deque[Tuple[int, ServiceRequest]] = deque(maxlen=max_results)
+        self.on_result: Optional[Callable[[int, ServiceRequest], None]] = None
+        self.cold_histogram = LatencyHistogram()
+        self.warm_histogram = LatencyHistogram()
+        self.target_rate: Optional[float] = None
+        self.achieved_rate: Optional[float] = None
+        self.shard = (0, 1)
+        self.show_progress = True
+        self._sessions = threading.local()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["on_result"] = None
+        del state["_sessions"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._sessions = threading.local()
+
+    def merge(self, other: Service) -> Service:
+        """Add the results of the same service requested from another process
+
+        Parameters
+        ----------
+            other : Service
+                A copy of this service that performed other requests
+
+        Returns
+        -------
+            Service
+                The service itself, with the results of both
+        """
+        self.results.extend(other.results)
+        self.cold_histogram.merge(other.cold_histogram)
+        self.warm_histogram.merge(other.warm_histogram)
+        for endpoint, histogram in other.endpoint_histograms.items():
+            self._get_endpoint_histogram(endpoint).merge(histogram)
+        if other.target_rate is not None:
+            self.target_rate = (self.target_rate or 0) + other.target_rate
+            self.achieved_rate = (self.achieved_rate or 0) + (other.achieved_rate or 0)
+        return self
+
+    @property
+    def histogram(self) -> LatencyHistogram:
+        return self.cold_histogram.copy().merge(self.warm_histogram)
 
-    def show_time(self) -> None:
-        if not self.execution_times:
+    def show_time(self, cold_and_warm: bool = False) -> None:
+        """Print the statistics of the execution times
+
+        Parameters
+        ----------
+            cold_and_warm : bool
+                Also print the statistics of the requests that opened a new connection (cold) and
+                of the ones that reused it (warm), by default False
+        """
+        histogram = self.histogram
+        if not histogram.count:
             raise ValueError("No execution times, you might want to perform_requests first")
-        time_mesurement = "miliseconds"
         print(f"\nService - {self.name}:")
-        print(f"Mean Execution Time: {mean(self.execution_times)} {time_mesurement}")
-        print(f"Median Execution Time: {median(self.execution_times)} {time_mesurement}")
-        print(f"Standard Deviation: {stdev(self.execution_times)} {time_mesurement}")
-        print(f"Minimum Execution Time: {min(self.execution_times)} {time_mesurement}")
-        print(f"Maximum Execution Time: {max(self.execution_times)} {time_mesurement}")
-        print(f"Number of requests: {self.number_of_requests}")
+        self._show_stats(histogram)
+        if self.target_rate is not None:
+            print(f"Target throughput: {self.target_rate} requests/second")
+            print(f"Achieved throughput: {self.achieved_rate} requests/second")
+        if cold_and_warm:
+            for connection, connection_histogram in (
+                ("Cold", self.cold_histogram),
+                ("Warm", self.warm_histogram),
+            ):
+                if connection_histogram.count:
+                    print(f"{connection} connections:")
+                    self._show_stats(connection_histogram)
+        for endpoint, endpoint_histogram in sorted(self.endpoint_histograms.items()):
+            percentiles = ", ".join(
+                f"p{percentile}: {value}"
+                for percentile, value in endpoint_histogram.percentiles().items()
+            )
+            print(f"{endpoint} - {endpoint_histogram.count} requests - {percentiles}")
         return None
 
-    def perform_requests(self, concurrently: bool) -> Service:
+    def _show_stats(self, histogram: LatencyHistogram) -> None:
+        time_mesurement = "miliseconds"
+        print(f"Mean Execution Time: {histogram.mean} {time_mesurement}")
+        print(f"Standard Deviation: {histogram.stdev} {time_mesurement}")
+        print(f"Minimum Execution Time: {histogram.min} {time_mesurement}")
+        for percentile, value in histogram.percentiles().items():
+            print(f"p{percentile} Execution Time: {value} {time_mesurement}")
+        print(f"Maximum Execution Time: {histogram.max} {time_mesurement}")
+        print(f"Number of requests: {histogram.count}")
+
+    def perform_requests(self, concurrently: bool, asynchronous: bool = False) -> Service:
+        if asynchronous:
+            return asyncio.run(self.perform_requests_async())
+        self.warm_up()
         self._request_concurrently() if concurrently else self._request_sequentially()
         return self
 
-    def _request_concurrently(self) -> None:
-        with ThreadPoolExecutor() as t:
-            futures = [t.submit(self._request) for _ in range(self.number_of_requests)]
-            for i, f in tqdm(
-                enumerate(as_completed(futures)),
-                desc=f"Running concurrent requests for {self.name}",
-                total=self.number_of_requests,
+    def warm_up(self) -> None:
+        for request in self._iter_warmup():
+            self._request(request)
+        return None
+
+    async def warm_up_async(self, client: AsyncClient) -> None:
+        for request in self._iter_warmup():
+            await self._request_async(client, True, request)
+        return None
+
+    async def perform_requests_async(self) -> Service:
+        """Perform the requests from the running event loop, keeping at most concurrency of them
+        in flight. Each worker takes the next request once its previous one is done, so any
+        number of requests can be sent without creating a task for each of them.
+
+        Returns
+        -------
+            Service
+                The service itself, with its results
+        """
+        service_requests = self._iter_requests()
+        progress = tqdm(
+            desc=f"Running asynchronous requests for {self.name}",
+            total=self._expected_requests(),
+            disable=not self.show_progress,
+        )
+
+        async def worker(client: AsyncClient) -> None:
+            cold = True
+            for i, request in service_requests:
+                cold = cold or not self.keep_alive
+                self._record(i, await self._request_async(client, cold, request))
+                progress.update()
+                cold = False
+
+        workers = min(self.concurrency, self._expected_requests() or self.concurrency)
+        async with self._get_async_client() as client:
+            await self.warm_up_async(client)
+            await asyncio.gather(*(worker(client) for _ in range(workers)))
+        progress.close()
+        return self
+
+    def perform_requests_at_rate(self, profile: RateProfile) -> Service:
+        return asyncio.run(self.perform_requests_at_rate_async(profile))
+
+    async def perform_requests_at_rate_async(self, profile: RateProfile) -> Service:
+        """Send the requests at the pace of the profile, without waiting for the previous ones to
+        be answered (open loop). The execution time of each request is measured from the moment
+        it should have been sent, so the time spent waiting for a slow service is not hidden.
+        At most concurrency requests are in flight, the rest wait for their turn.
+
+        Parameters
+        ----------
+            profile : RateProfile
+                The rate, in requests per second, and the duration, in seconds, of the load
+
+        Returns
+        -------
+            Service
+                The service itself, with its results and its target and achieved throughput
+        """
+        progress = tqdm(
+            desc=f"Running requests at {profile.mean_rate} requests/second for {self.name}",
+            total=self._expected_requests(profile.number_of_requests),
+            disable=not self.show_progress,
+        )
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: Set[asyncio.Task] = set()
+        in_flight = most_in_flight = 0
+
+        async def send(
+            client: AsyncClient,
+            i: int,
+            request: CorpusRequest,
+            scheduled_time: float,
+            cold: bool,
+        ) -> None:
+            nonlocal in_flight
+            try:
+                self._record(i, await self._request_async(client, cold, request, scheduled_time))
+                progress.update()
+            finally:
+                in_flight -= 1
+                slots.release()
+
+        async with self._get_async_client() as client:
+            await self.warm_up_async(client)
+            # The histograms keep the requests of the previous runs
+            previous_requests = self.cold_histogram.count + self.warm_histogram.count
+            start_time = time.perf_counter()
+            first, step = self.shard
+            for (i, request), send_time in zip(
+                self._iter_requests(profile.number_of_requests),
+                islice(profile.send_times(), first, None, step),
             ):
-                result = f.result()
-                self.results.append((i, result))
-                self.execution_times.append(result.execution_time)
+                if (delay := start_time + send_time - time.perf_counter()) > 0:
+                    await asyncio.sleep(delay)
+                await slots.acquire()
+                # A new connection is only needed when there are more requests in flight than ever
+                in_flight += 1
+                cold = not self.keep_alive or in_flight > most_in_flight
+                most_in_flight = max(most_in_flight, in_flight)
+                task = asyncio.create_task(send(client, i, request, start_time + send_time, cold))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+            elapsed_time = time.perf_counter() - start_time
+        progress.close()
+        self.target_rate = profile.mean_rate / self.shard[1]
+        requests = self.cold_histogram.count + self.warm_histogram.count - previous_requests
+        self.achieved_rate = requests / elapsed_time
+        return self
+
+    def _request_concurrently(self) -> None:
+        progress = tqdm(
+            desc=f"Running concurrent requests for {self.name}",
+            total=self._expected_requests(),
+            disable=not self.show_progress,
+        )
+        with ThreadPoolExecutor(max_workers=self.concurrency) as t:
+            futures: Dict[Future, int] = {}
+            for i, request in self._iter_requests():
+                # Only a few requests wait for a thread, so the next ones are read when needed
+                if len(futures) >= 2 * self.concurrency:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    self._record_futures(futures, done, progress)
+                futures[t.submit(self._request, request)] = i
+            self._record_futures(futures, as_completed(list(futures)), progress)
+        progress.close()
         return None
 
+    def _record_futures(
+        self,
+        futures: Dict[Future, int],
+        done: Iterable[Future],
+        progress: tqdm,
+    ) -> None:
+        for future in done:
+            self._record(futures.pop(future), future.result())
+            progress.update()
+
     def _request_sequentially(self) -> None:
-        for i in tqdm(
-            range(self.number_of_requests),
+        for i, request in tqdm(
+            self._iter_requests(),
             desc=f"Running sequential requests for {self.name}",
-            total=self.number_of_requests,
+            total=self._expected_requests(),
+            disable=not self.show_progress,
         ):
-            result = self._request()
-            self.results.append((i, result))
-            self.execution_times.append(result.execution_time)
+            self._record(i, self._request(request))
         return None
 
-    def _request(self) -> ServiceRequest:
+    def _iter_requests(
+        self,
+        number_of_requests: Optional[int] = None,
+    ) -> Iterator[Tuple[int, CorpusRequest]]:
+        number_of_requests = number_of_requests or self.number_of_requests
+        if not self.corpus and number_of_requests is None:
+            raise ValueError("The number_of_requests is needed when there is no corpus")
+        service_requests = self._read_requests(number_of_requests)
+        # Each process only sends the requests of its shard, with the indexes of the whole run
+        first, step = self.shard
+        return zip(count(first, step), islice(service_requests, first, number_of_requests, step))
+
+    def _iter_warmup(self) -> Iterator[CorpusRequest]:
+        return islice(self._read_requests(self.warmup), self.warmup)
+
+    def _read_requests(self, number_of_requests: Optional[int]) -> Iterator[CorpusRequest]:
+        if self.corpus:
+            return read_corpus(self.corpus)
+        if number_of_requests is None:
+            return repeat(DEFAULT_REQUEST)
+        return repeat(DEFAULT_REQUEST, number_of_requests)
+
+    def _expected_requests(self, number_of_requests: Optional[int] = None) -> Optional[int]:
+        number_of_requests = number_of_requests or self.number_of_requests
+        if number_of_requests is None:
+            return None
+        return len(range(self.shard[0], number_of_requests, self.shard[1]))
+
+    def _prepare(
+        self,
+        request: CorpusRequest,
+    ) -> Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        url = self.url.rstrip("/") + request.path if request.path else self.url
+        headers = {**(self.headers or {}), **(request.headers or {})} or None
+        params = {**(self.params or {}), **(request.params or {})} or None
+        return url, headers, params
+
+    def _keeps_body(self, i: int) -> bool:
+        return math.floor(i * self.body_sample_rate) != math.floor((i - 1) * self.body_sample_rate)
+
+    def _record(self, i: int, result: ServiceRequest) -> None:
+        if self.on_result:
+            self.on_result(i, result)
+        self.results.append((i, result if self._keeps_body(i) else result._replace(body=None)))
+        if result.cold:
+            self.cold_histogram.record(result.execution_time)
+        else:
+            self.warm_histogram.record(result.execution_time)
+        if result.endpoint:
+            self._get_endpoint_histogram(result.endpoint).record(result.execution_time)
+
+    def _get_endpoint_histogram(self, endpoint: str) -> LatencyHistogram:
+        if endpoint not in self.endpoint_histograms:
+            if len(self.endpoint_histograms) >= MAX_ENDPOINTS:
+                endpoint = OTHER_ENDPOINTS
+            if endpoint not in self.endpoint_histograms:
+                self.endpoint_histograms[endpoint] = LatencyHistogram()
+        return self.endpoint_histograms[endpoint]
+
+    def _get_session(self) -> requests.Session:
+        session = getattr(self._sessions, "session", None)
+        if session is None:
+            session = self._sessions.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if not self.keep_alive:
+                session.headers["Connection"] = "close"
+        return session
+
+    def _get_async_client(self) -> AsyncClient:
+        return get_async_client(self.client, self.verify, self.concurrency, self.keep_alive)
+
+    def _request(self, request: CorpusRequest = DEFAULT_REQUEST) -> ServiceRequest:
+        # Each thread has its own session, so only its first request has to open a connection
+        cold = not self.keep_alive or getattr(self._sessions, "session", None) is None
+        session = self._get_session()
+        url, headers, params = self._prepare(request)
         start_datetime = datetime.now()
-        start_time = time.time()
-        response = requests.get(
-            self.url,
-            headers=self.headers,
-            params=self.params,
+        start_time = time.perf_counter()
+        response = session.request(
+            request.method,
+            url,
+            headers=headers,
+            params=params,
+            data=request.body,
             verify=self.verify,
         )
-        end_time = time.time()
-        elapsed_time = (end_time - start_time) * 1000
-        return ServiceRequest(
-            start_datetime=start_datetime,
-            execution_time=elapsed_time,
-            response=response,
-        )
+        elapsed_time = (time.perf_counter() - start_time) * 1000
+        endpoint = request.endpoint if self.corpus else ""
+        return _summarize(start_datetime, elapsed_time, response, cold, endpoint)
+
+    async def _request_async(
+        self,
+        client: AsyncClient,
+        cold: bool,
+        request: CorpusRequest = DEFAULT_REQUEST,
+        scheduled_time: Optional[float] = None,
+    ) -> ServiceRequest:
+        url, headers, params = self._prepare(request)
+        start_datetime = datetime.now()
+        start_time = time.perf_counter() if scheduled_time is None else scheduled_time
+        response = await client.request(request.method, url, headers, params, request.body)
+        elapsed_time = (time.perf_counter() - start_time) * 1000
+        endpoint = request.endpoint if self.corpus else ""
+        return _summarize(start_datetime, elapsed_time, response, cold, endpoint)
+
+
+class ResponseComparator:
+    def __init__(
+        self,
+        number_of_services: int = 2,
+        max_diffs: int = 1,
+        max_pending_bodies: int = 1000,
+        number_of_requests: Optional[int] = None,
+    ) -> None:
+        """Compares the responses of the services as soon as all of them have answered the same
+        request. The status codes and body hashes are compared first and the bodies are only
+        diffed when they don't match, so most of the comparisons are cheap.
+
+        Parameters
+        ----------
+            number_of_services : int
+                The number of services whose responses are compared with the first one's,
+                by default 2
+
+            max_diffs : int
+                The number of mismatches whose bodies are diffed and shown, by default 1
+
+            max_pending_bodies : int
+                The number of requests waiting for the other services that keep their bodies.
+                Past it, only their hashes are kept and their mismatches can't be diffed,
+                by default 1000
+
+            number_of_requests : Optional[int]
+                Only the requests with a lower index are compared. If None, all of them are,
+                by default None
+        """
+        self.number_of_services = number_of_services
+        self.max_diffs = max_diffs
+        self.max_pending_bodies = max_pending_bodies
+        self.number_of_requests = number_of_requests
+        self.pending: Dict[int, Dict[int, ServiceRequest]] = {}
+        self.compared = 0
+        self.status_mismatches = 0
+        self.body_mismatches = 0
+        self.diffs: List[Tuple[int, Dict[str, Any]]] = []
+        self.compared_by_endpoint: Counter[str] = Counter()
+        self.mismatches_by_endpoint: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def mismatches(self) -> int:
+        return self.status_mismatches + self.body_mismatches
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def merge(self, other: ResponseComparator) -> ResponseComparator:
+        """Add the comparisons made by another comparator, like the ones of other processes
+
+        Parameters
+        ----------
+            other : ResponseComparator
+                A comparator of the same services that compared other requests
+
+        Returns
+        -------
+            ResponseComparator
+                The comparator itself, with the comparisons of both
+        """
+        self.compared += other.compared
+        self.status_mismatches += other.status_mismatches
+        self.body_mismatches += other.body_mismatches
+        self.diffs.extend(other.diffs[: self.max_diffs - len(self.diffs)])
+        self.compared_by_endpoint.update(other.compared_by_endpoint)
+        self.mismatches_by_endpoint.update(other.mismatches_by_endpoint)
+        for i, responses in other.pending.items():
+            self.pending.setdefault(i, {}).update(responses)
+        return self
+
+    def listener(self, service_index: int) -> Callable[[int, ServiceRequest], None]:
+        return lambda i, result: self.add(service_index, i, result)
+
+    def add(self, service_index: int, i: int, result: ServiceRequest) -> None:
+        if self.number_of_requests is not None and i >= self.number_of_requests:
+            return None
+        with self._lock:
+            if len(self.pending) >= self.max_pending_bodies:
+                result = result._replace(body=None)
+            responses = self.pending.setdefault(i, {})
+            responses[service_index] = result
+            if len(responses) < self.number_of_services:
+                return None
+            del self.pending[i]
+            self.compared += 1
+            self.compared_by_endpoint[result.endpoint] += 1
+            for service_index in range(1, self.number_of_services):
+                self._compare(i, responses[0], responses[service_index])
+        return None
+
+    def _compare(self, i: int, expected: ServiceRequest, result: ServiceRequest) -> None:
+        if expected.status_code != result.status_code:
+            self.status_mismatches += 1
+        elif expected.body_hash != result.body_hash:
+            self.body_mismatches += 1
+        else:
+            return None
+        self.mismatches_by_endpoint[result.endpoint] += 1
+        if len(self.diffs) >= self.max_diffs:
+            return None
+        diff: Dict[str, Any] = {"status_code": (expected.status_code, result.status_code)}
+        if expected.body is not None and result.body is not None:
+            diff["body"] = DeepDiff(_parse_body(expected.body), _parse_body(result.body))
+        self.diffs.append((i, diff))
+        tqdm.write(f"Request {i} doesn't match:\n{pp.pformat(diff)}")
+        return None
+
+
+def _parse_body(body: bytes) -> Any:
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body.decode(errors="replace")
 
 
 class CompareServices:
@@ -106,40 +695,293 @@ class CompareServices:
         self,
         services: List[Service],
         concurrently: bool = True,
+        asynchronous: bool = False,
+        rate: Optional[RateProfile] = None,
+        processes: int = 1,
+        interleaved: bool = False,
+        factory: Optional[DataFactory] = None,
     ):
+        """Request several services and compare their execution times and responses
+
+        Parameters
+        ----------
+            services : List[Service]
+                The services to compare, the first one is the reference
+
+            concurrently : bool
+                Request all the services at the same time, by default True
+
+            asynchronous : bool
+                Send the requests from an event loop instead of threads, by default False
+
+            rate : Optional[RateProfile]
+                If given, the requests are sent at this pace instead of as fast as possible,
+                by default None
+
+            processes : int
+                The number of processes sending the requests. Each one sends every n-th request
+                to all the services, and their histograms and comparisons are merged at the end,
+                by default 1
+
+            interleaved : bool
+                Send each request to all the services one after the other, in a random order,
+                before sending the next one. Warmup, caching and network drift then affect every
+                service alike, so their execution times can be compared request by request. With
+                concurrently or asynchronous, several requests are interleaved at the same time,
+                by default False
+
+            factory : Optional[DataFactory]
+                Draws the order in which the services receive each interleaved request. Pass a
+                seeded one to get the same order on every run, by default None
+        """
+        if interleaved and rate:
+            raise ValueError("The requests can't be interleaved when they are sent at a rate")
         self.services = services
         self.concurrently = concurrently
+        self.asynchronous = asynchronous
+        self.rate = rate
+        self.processes = processes
+        self.interleaved = interleaved
+        self.factory = factory
 
     def compare(
         self,
         number_requests: Optional[int] = None,
         number_comparaisons: int = 1,
-    ) -> None:
-        service1, service2 = services = self._request()
-        diffs = []
-        for i in range(number_requests or len(service1.results)):
-            _, resp1 = service1.results[i]
-            _, resp2 = service2.results[i]
-            if number_comparaisons:
-                number_comparaisons -= 1
-                diffs.append(DeepDiff(resp1.response, resp2.response))
+    ) -> ResponseComparator:
+        """Request the services and compare their responses to the same requests while they
+        answer
+
+        Parameters
+        ----------
+            number_requests : Optional[int]
+                Only the requests with a lower index are compared. If None, all of them are,
+                by default None
+
+            number_comparaisons : int
+                The number of mismatches whose bodies are diffed and shown, by default 1
+
+        Returns
+        -------
+            ResponseComparator
+                The number of compared requests and mismatches, and the diffs
+        """
+        comparator = ResponseComparator(
+            len(self.services), number_comparaisons, number_of_requests=number_requests
+        )
+        if self.processes > 1:
+            services = self._request_in_processes(comparator)
+        else:
+            services = self._request_and_compare(comparator)
+        self._show_comparaison(comparator, services)
+        return comparator
+
+    def check_regression(
+        self,
+        comparator: Optional[ResponseComparator] = None,
+        thresholds: Optional[Dict[float, float]] = None,
+        confidence: float = 0.95,
+        resamples: int = 1000,
+        seed: Optional[int] = None,
+    ) -> RegressionReport:
+        """Tell if the second service is slower than the first one, once they have been compared
+
+        Parameters
+        ----------
+            comparator : Optional[ResponseComparator]
+                The comparator returned by compare, whose counts are added to the report,
+                by default None
+
+            thresholds : Optional[Dict[float, float]]
+                The relative increase allowed for each percentile, like {99: 0.2} to allow a p99
+                20% slower, by default None
 
-        self._show_comparaison(diffs, services)
+            confidence : float
+                The confidence level of the bootstrap intervals, by default 0.95
+
+            resamples : int
+                The number of bootstrap resamples, by default 1000
+
+            seed : Optional[int]
+                The seed of the resamples, by default None
+
+        Returns
+        -------
+            RegressionReport
+                The delta of each percentile with its interval, the Mann-Whitney p-value and the
+                verdict, which can be exported as JSON or turned into an exit code
+        """
+        current, new = self.services[:2]
+        report = check_regression(
+            current.histogram,
+            new.histogram,
+            thresholds,
+            confidence,
+            resamples,
+            seed,
+            compared=comparator.compared if comparator else 0,
+            mismatches=comparator.mismatches if comparator else 0,
+        )
+        self._show_regression(report, current, new)
+        return report
+
+    def _show_regression(self, report: RegressionReport, current: Service, new: Service) -> None:
+        print(f"\n{new.name} compared to {current.name}:")
+        for delta in report.deltas:
+            verdict = "REGRESSION" if delta.regression else "ok"
+            print(
+                f"p{delta.percentile}: {delta.current} -> {delta.new} miliseconds,"
+                f" {delta.delta:+.1%} ({delta.low:+.1%}, {delta.high:+.1%})"
+                f" allowed {delta.threshold:+.1%} - {verdict}"
+            )
+        print(f"Mann-Whitney p-value of being slower: {report.p_value}")
+        print(f"Regression: {report.regression}")
+
+    def _request_and_compare(self, comparator: ResponseComparator) -> List[Service]:
+        for service_index, service in enumerate(self.services):
+            service.on_result = comparator.listener(service_index)
+        try:
+            return self._request()
+        finally:
+            for service in self.services:
+                service.on_result = None
+
+    def _request_in_processes(self, comparator: ResponseComparator) -> List[Service]:
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            shards = executor.map(
+                _request_shard, repeat(self), range(self.processes), repeat(comparator)
+            )
+            for shard_services, shard_comparator in shards:
+                for service, shard_service in zip(self.services, shard_services):
+                    service.merge(shard_service)
+                comparator.merge(shard_comparator)
+        return self.services
 
     def _request(self) -> List[Service]:
+        if self.interleaved:
+            return self._request_interleaved()
+        if self.asynchronous or self.rate:
+            return asyncio.run(self._request_asynchronously())
         request = self._request_concurrently if self.concurrently else self._request_sequentially
         return request()
 
+    async def _request_asynchronously(self) -> List[Service]:
+        if self.concurrently:
+            return await asyncio.gather(*(self._perform(service) for service in self.services))
+        return [await self._perform(service) for service in self.services]
+
+    async def _perform(self, service: Service) -> Service:
+        if self.rate:
+            return await service.perform_requests_at_rate_async(self.rate)
+        return await service.perform_requests_async()
+
     def _request_concurrently(self) -> List[Service]:
         with ThreadPoolExecutor(max_workers=len(self.services)) as t:
             futures = [t.submit(service.perform_requests, True) for service in self.services]
-            return [future.result() for future in as_completed(futures)]
+            return [future.result() for future in futures]
 
     def _request_sequentially(self) -> List[Service]:
         return [service.perform_requests(False) for service in self.services]
 
-    def _show_comparaison(self, diffs: List, services: List[Service]) -> None:
-        for diff in diffs:
+    def _request_interleaved(self) -> List[Service]:
+        if self.asynchronous:
+            return asyncio.run(self._request_interleaved_async())
+        for service in self.services:
+            service.warm_up()
+        interleaved_requests = self._iter_interleaved()
+        progress = self._interleaved_progress()
+        if not self.concurrently:
+            for i, service_requests in interleaved_requests:
+                self._record_interleaved(i, self._send_interleaved(service_requests), progress)
+            progress.close()
+            return self.services
+        concurrency = min(service.concurrency for service in self.services)
+        with ThreadPoolExecutor(max_workers=concurrency) as t:
+            futures: Dict[Future, int] = {}
+            for i, service_requests in interleaved_requests:
+                if len(futures) >= 2 * concurrency:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._record_interleaved(futures.pop(future), future.result(), progress)
+                futures[t.submit(self._send_interleaved, service_requests)] = i
+            for future in as_completed(list(futures)):
+                self._record_interleaved(futures.pop(future), future.result(), progress)
+        progress.close()
+        return self.services
+
+    async def _request_interleaved_async(self) -> List[Service]:
+        interleaved_requests = self._iter_interleaved()
+        progress = self._interleaved_progress()
+
+        async def worker(clients: Dict[int, AsyncClient]) -> None:
+            cold = set(clients)
+            for i, service_requests in interleaved_requests:
+                results = []
+                for service_index, request in service_requests:
+                    service = self.services[service_index]
+                    is_cold = service_index in cold or not service.keep_alive
+                    result = await service._request_async(clients[service_index], is_cold, request)
+                    results.append((service_index, result))
+                    cold.discard(service_index)
+                self._record_interleaved(i, results, progress)
+
+        async with AsyncExitStack() as stack:
+            clients = {
+                service_index: await stack.enter_async_context(service._get_async_client())
+                for service_index, service in enumerate(self.services)
+            }
+            for service_index, service in enumerate(self.services):
+                await service.warm_up_async(clients[service_index])
+            workers = min(service.concurrency for service in self.services)
+            await asyncio.gather(*(worker(clients) for _ in range(workers)))
+        progress.close()
+        return self.services
+
+    def _iter_interleaved(self) -> Iterator[Tuple[int, List[Tuple[int, CorpusRequest]]]]:
+        # Every service reads the same requests, so the i-th ones are sent together
+        rng = get_rng(self.factory)
+        for service_requests in zip(*(service._iter_requests() for service in self.services)):
+            order = rng.permutation(len(self.services)).tolist()
+            yield service_requests[0][0], [
+                (service_index, service_requests[service_index][1]) for service_index in order
+            ]
+
+    def _send_interleaved(
+        self,
+        service_requests: List[Tuple[int, CorpusRequest]],
+    ) -> List[Tuple[int, ServiceRequest]]:
+        return [
+            (service_index, self.services[service_index]._request(request))
+            for service_index, request in service_requests
+        ]
+
+    def _record_interleaved(
+        self,
+        i: int,
+        results: List[Tuple[int, ServiceRequest]],
+        progress: tqdm,
+    ) -> None:
+        for service_index, result in results:
+            self.services[service_index]._record(i, result)
+        progress.update()
+
+    def _interleaved_progress(self) -> tqdm:
+        return tqdm(
+            desc=f"Running interleaved requests for {len(self.services)} services",
+            total=self.services[0]._expected_requests(),
+            disable=not self.services[0].show_progress,
+        )
+
+    def _show_comparaison(self, comparator: ResponseComparator, services: List[Service]) -> None:
+        print(f"\nCompared requests: {comparator.compared}")
+        print(f"Status code mismatches: {comparator.status_mismatches}")
+        print(f"Body mismatches: {comparator.body_mismatches}")
+        for endpoint, compared in sorted(comparator.compared_by_endpoint.items()):
+            if endpoint:
+                mismatches = comparator.mismatches_by_endpoint[endpoint]
+                print(f"{endpoint} - {compared} compared - {mismatches} mismatches")
+        for i, diff in comparator.diffs:
+            print(f"Request {i}:")
             pp.pprint(diff)
 
         for service in services:
@@ -148,6 +990,17 @@ class CompareServices:
         return None
 
 
+def _request_shard(
+    compare_services: CompareServices,
+    shard: int,
+    comparator: ResponseComparator,
+) -> Tuple[List[Service], ResponseComparator]:
+    for service in compare_services.services:
+        service.shard = (shard, compare_services.processes)
+        service.show_progress = False
+    return compare_services._request_and_compare(comparator), comparator
+
+
 def compare(
     current_service_url: str,
     new_service_url: str,
@@ -156,12 +1009,207 @@ def compare(
     number_of_requests: int = 1000,
     verify: bool = False,
     concurrently: bool = True,
+    asynchronous: bool = False,
+    concurrency: int = 100,
+    client: str = "",
+    pool_size: int = 10,
+    keep_alive: bool = True,
+    rate: Optional[RateProfile] = None,
+    processes: int = 1,
+    interleaved: bool = False,
+    warmup: int = 0,
 ):
     current_name, new_name = "Current Service", "New Service"
+    settings = (
+        headers,
+        params,
+        number_of_requests,
+        verify,
+        concurrency,
+        client,
+        pool_size,
+        keep_alive,
+    )
     return CompareServices(
         [
-            Service(current_service_url, current_name, headers, params, number_of_requests, verify),
-            Service(new_service_url, new_name, headers, params, number_of_requests, verify),
+            Service(current_service_url, current_name, *settings, warmup=warmup),
+            Service(new_service_url, new_name, *settings, warmup=warmup),
         ],
         concurrently,
+        asynchronous,
+        rate,
+        processes,
+        interleaved,
     ).compare()
+
+
+def replay(
+    current_service_url: str,
+    new_service_url: str,
+    corpus: str,
+    number_of_requests: Optional[int] = None,
+    verify: bool = False,
+    concurrently: bool = True,
+    concurrency: int = 100,
+    client: str = "",
+    rate: Optional[RateProfile] = None,
+    number_comparaisons: int = 1,
+    processes: int = 1,
+    interleaved: bool = False,
+    warmup: int = 0,
+) -> ResponseComparator:
+    """Send the requests of a corpus to both services at the same time and compare their
+    execution times and responses, endpoint by endpoint
+
+    Parameters
+    ----------
+        current_service_url : str
+            The base url of the service used as reference
+
+        new_service_url : str
+            The base url of the service to validate
+
+        corpus : str
+            A JSONL or HAR file with the requests to replay
+
+        number_of_requests : Optional[int]
+            The number of requests of the corpus to replay. If None, all of them,
+            by default None
+
+        verify : bool
+            Verify the certificates of https urls, by default False
+
+        concurrently : bool
+            Request both services at the same time, by default True
+
+        concurrency : int
+            The maximum number of requests in flight for each service, by default 100
+
+        client : str
+            The client used to send the requests, one of aiohttp, httpx or asyncio. If empty,
+            the first one installed is used, by default ""
+
+        rate : Optional[RateProfile]
+            If given, the requests are sent at this pace instead of as fast as possible,
+            by default None
+
+        number_comparaisons : int
+            The number of mismatches whose bodies are diffed and shown, by default 1
+
+        processes : int
+            The number of processes sending the requests, by default 1
+
+        interleaved : bool
+            Send each request to both services one after the other, in a random order, before
+            sending the next one, by default False
+
+        warmup : int
+            The number of requests sent to each service before the measured ones, by default 0
+
+    Returns
+    -------
+        ResponseComparator
+            The number of compared requests and mismatches, in total and by endpoint
+    """
+    services = [
+        Service(
+            url,
+            name,
+            number_of_requests=number_of_requests,
+            verify=verify,
+            concurrency=concurrency,
+            client=client,
+            corpus=corpus,
+            warmup=warmup,
+        )
+        for url, name in (
+            (current_service_url, "Current Service"),
+            (new_service_url, "New Service"),
+        )
+    ]
+    return CompareServices(services, concurrently, True, rate, processes, interleaved).compare(
+        number_comparaisons=number_comparaisons
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare the execution times and responses of two services",
+    )
+    parser.add_argument("current_service_url", help="The url of the service used as reference")
+    parser.add_argument("new_service_url", help="The url of the service to validate")
+    parser.add_argument("-n", "--number-of-requests", type=int, default=None)
+    parser.add_argument("--corpus", help="A JSONL or HAR file with the requests to replay")
+    parser.add_argument("--asynchronous", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument(
+        "--interleaved",
+        action="store_true",
+        help="Send each request to both services one after the other, in a random order",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=0,
+        help="The number of requests sent to each service before the measured ones",
+    )
+    parser.add_argument("--rate", type=float, help="The requests per second to send")
+    parser.add_argument("--duration", type=float, default=60, help="In seconds, with --rate")
+    parser.add_argument("--final-rate", type=float, help="Ramp the rate up or down to this one")
+    parser.add_argument(
+        "--threshold",
+        action="append",
+        default=[],
+        metavar="PERCENTILE=INCREASE",
+        help="The relative increase allowed for a percentile, like 99=0.2",
+    )
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--report", help="Write the report as JSON to this file")
+    parser.add_argument(
+        "--fail-on-mismatch",
+        action="store_true",
+        help="Also exit with 1 when the responses don't match",
+    )
+    args = parser.parse_args(argv)
+
+    number_of_requests = args.number_of_requests
+    if number_of_requests is None and not args.corpus:
+        number_of_requests = 1000
+    services = [
+        Service(
+            url,
+            name,
+            number_of_requests=number_of_requests,
+            concurrency=args.concurrency,
+            corpus=args.corpus,
+            warmup=args.warmup,
+        )
+        for url, name in (
+            (args.current_service_url, "Current Service"),
+            (args.new_service_url, "New Service"),
+        )
+    ]
+    rate = RateProfile(args.rate, args.duration, args.final_rate) if args.rate else None
+    thresholds: Dict[float, float] = {}
+    for threshold in args.threshold:
+        percentile, value = threshold.split("=")
+        thresholds[float(percentile)] = float(value)
+    compare_services = CompareServices(
+        services,
+        True,
+        args.asynchronous or bool(args.corpus),
+        rate,
+        args.processes,
+        args.interleaved,
+    )
+    comparator = compare_services.compare()
+    report = compare_services.check_regression(comparator, thresholds or None, args.confidence)
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(report.to_json())
+    return report.exit_code(args.fail_on_mismatch)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+# The segments of a path that are ids, like numbers, UUIDs or long hexadecimal keys
+ID_SEGMENT = re.compile(
+    r"\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{24,}",
+    re.IGNORECASE,
+)
+
+
+class CorpusRequest(NamedTuple):
+    method: str = "GET"
+    path: str = ""
+    headers: Optional[Dict[str, Any]] = None
+    params: Optional[Dict[str, Any]] = None
+    body: Optional[bytes] = None
+
+    @property
+    def endpoint(self) -> str:
+        """The method and the path without the query string, where the ids are replaced by {id},
+        so /users/123 and /users/124 are the same endpoint"""
+        segments = self.path.split("?")[0].split("/")
+        path = "/".join(
+            "{id}" if ID_SEGMENT.fullmatch(segment) else segment for segment in segments
+        )
+        return f"{self.method} {path or '/'}"
+
+
+def read_corpus(filename: str) -> Iterator[CorpusRequest]:
+    """Lazily read the requests to replay. Each line of a JSONL file is either a request like
+    {"method": "POST", "path": "/items?page=1", "headers": {}, "params": {}, "body": {}} or a HAR
+    entry. A .har file is a single JSON document, so it's read at once.
+
+    Parameters
+    ----------
+        filename : str
+            The path of the JSONL or HAR file
+
+    Yields
+    ------
+        CorpusRequest
+            The requests, in the order of the file. Their path keeps the query string but not
+            the host, so they can be sent to any service
+    """
+    with open(filename) as f:
+        if filename.endswith(".har"):
+            for entry in json.load(f)["log"]["entries"]:
+                yield _from_har(entry)
+            return None
+        for line in f:
+            if line.strip():
+                data = json.loads(line)
+                yield _from_har(data) if "request" in data else _from_dict(data)
+    return None
+
+
+def _from_dict(data: Dict[str, Any]) -> CorpusRequest:
+    body = data.get("body")
+    if body is not None and not isinstance(body, str):
+        body = json.dumps(body)
+    return CorpusRequest(
+        method=data.get("method", "GET").upper(),
+        path=_path(data.get("path") or data.get("url", "")),
+        headers=data.get("headers"),
+        params=data.get("params"),
+        body=body.encode() if body is not None else None,
+    )
+
+
+def _from_har(entry: Dict[str, Any]) -> CorpusRequest:
+    request = entry["request"]
+    body = request.get("postData", {}).get("text")
+    return CorpusRequest(
+        method=request.get("method", "GET").upper(),
+        path=_path(request["url"]),
+        headers=_har_pairs(request.get("headers", []), skip=("host", "content-length")),
+        body=body.encode() if body is not None else None,
+    )
+
+
+def _har_pairs(pairs: List[Dict[str, str]], skip: tuple[str, ...] = ()) -> Dict[str, str]:
+    # HTTP/2 pseudo headers, like :authority, can't be sent again
+    return {
+        pair["name"]: pair["value"]
+        for pair in pairs
+        if pair["name"].lower() not in skip and not pair["name"].startswith(":")
+    }
+
+
+def _path(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
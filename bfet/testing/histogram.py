@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class LatencyHistogram:
+    def __init__(
+        self,
+        highest_value: float = 3600000,
+        significant_digits: int = 3,
+        unit: float = 0.001,
+    ) -> None:
+        """Counts the recorded values in buckets whose width grows with the values, like an HDR
+        histogram, so the memory used is fixed and the percentiles keep the given precision
+        whatever the number of values recorded.
+
+        Parameters
+        ----------
+            highest_value : float
+                The highest value that can be told apart, the higher ones are counted with it.
+                By default 3600000, one hour in milliseconds
+
+            significant_digits : int
+                The number of significant digits kept for each value, by default 3
+
+            unit : float
+                The smallest value that can be told apart, by default 0.001, one microsecond when
+                the values are milliseconds
+        """
+        self.highest_value = highest_value
+        self.significant_digits = significant_digits
+        self.unit = unit
+        self._bits = math.ceil(math.log2(2 * 10**significant_digits))
+        self._half_count = 2 ** (self._bits - 1)
+        self._highest_unit = max(int(highest_value / unit), 2**self._bits)
+        self.counts = np.zeros(self._index(self._highest_unit) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, units: int) -> int:
+        if units < 2 * self._half_count:
+            return units
+        shift = units.bit_length() - self._bits
+        return shift * self._half_count + (units >> shift)
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < 2 * self._half_count:
+            return index
+        shift, sub_bucket = divmod(index, self._half_count)
+        return ((sub_bucket + self._half_count + 1) << (shift - 1)) - 1
+
+    def record(self, value: float) -> None:
+        units = min(max(int(value / self.unit), 0), self._highest_unit)
+        self.counts[self._index(units)] += 1
+        self.count += 1
+        self.total += value
+        self.total_squares += value * value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def stdev(self) -> float:
+        if self.count < 2:
+            return 0.0
+        variance = (self.total_squares - self.total**2 / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def percentile(self, percentile: float) -> float:
+        """The value below which the given percentage of the recorded values are
+
+        Parameters
+        ----------
+            percentile : float
+                A number between 0 and 100
+
+        Returns
+        -------
+            float
+                The highest value of the bucket holding the percentile, never above the maximum
+                recorded, or 0.0 if nothing has been recorded
+        """
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(percentile / 100 * self.count), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self._highest_equivalent(index) * self.unit, self.max)
+
+    def buckets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """The highest value and the count of each bucket with values, in increasing order"""
+        indexes = self.counts.nonzero()[0]
+        values = [
+            min(self._highest_equivalent(int(index)) * self.unit, self.max) for index in indexes
+        ]
+        return np.array(values, dtype=float), self.counts[indexes]
+
+    def percentiles(self, percentiles: Iterable[float] = PERCENTILES) -> Dict[float, float]:
+        return {percentile: self.percentile(percentile) for percentile in percentiles}
+
+    def merge(self, other: LatencyHistogram) -> LatencyHistogram:
+        """Add the values recorded by another histogram, like the ones filled by other threads or
+        processes
+
+        Parameters
+        ----------
+            other : LatencyHistogram
+                A histogram created with the same settings
+
+        Returns
+        -------
+            LatencyHistogram
+                The histogram itself, with the values of both
+        """
+        if self._settings() != other._settings():
+            raise ValueError("Only histograms created with the same settings can be merged")
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.total_squares += other.total_squares
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def copy(self) -> LatencyHistogram:
+        return LatencyHistogram(*self._settings()).merge(self)
+
+    def _settings(self) -> tuple[float, int, float]:
+        return self.highest_value, self.significant_digits, self.unit
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "highest_value": self.highest_value,
+            "significant_digits": self.significant_digits,
+            "unit": self.unit,
+            "count": self.count,
+            "total": self.total,
+            "total_squares": self.total_squares,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "percentiles": {str(key): value for key, value in self.percentiles().items()},
+            "counts": {str(index): int(self.counts[index]) for index in self.counts.nonzero()[0]},
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> LatencyHistogram:
+        histogram = cls(data["highest_value"], data["significant_digits"], data["unit"])
+        for index, count in data["counts"].items():
+            histogram.counts[int(index)] = count
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.total_squares = data["total_squares"]
+        if histogram.count:
+            histogram.min, histogram.max = data["min"], data["max"]
+        return histogram
+
+    @classmethod
+    def from_json(cls, data: str) -> LatencyHistogram:
+        return cls.from_dict(json.loads(data))
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import ssl
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import SplitResult, urlencode, urlsplit
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class HttpResponse(NamedTuple):
+    status_code: int
+    content: bytes
+    headers: Dict[str, str]
+
+
+class AsyncClient:
+    """Base of the clients used to send the requests from an event loop. They are used as async
+    context managers, so their connections are closed once the requests are done."""
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[bytes] = None,
+    ) -> HttpResponse:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+    async def __aenter__(self) -> AsyncClient:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+
+class AiohttpClient(AsyncClient):
+    def __init__(self, verify: bool = False, limit: int = 100, keep_alive: bool = True) -> None:
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=limit,
+                ssl=None if verify else False,
+                force_close=not keep_alive,
+            )
+        )
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[bytes] = None,
+    ) -> HttpResponse:
+        async with self.session.request(
+            method, url, headers=headers, params=params, data=body
+        ) as response:
+            content = await response.read()
+            return HttpResponse(response.status, content, dict(response.headers))
+
+    async def close(self) -> None:
+        await self.session.close()
+
+
+class HttpxClient(AsyncClient):
+    def __init__(self, verify: bool = False, limit: int = 100, keep_alive: bool = True) -> None:
+        self.client = httpx.AsyncClient(
+            verify=verify,
+            limits=httpx.Limits(
+                max_connections=limit,
+                max_keepalive_connections=limit if keep_alive else 0,
+            ),
+        )
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[bytes] = None,
+    ) -> HttpResponse:
+        response = await self.client.request(
+            method, url, headers=headers, params=params, content=body
+        )
+        return HttpResponse(response.status_code, response.content, dict(response.headers))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncioClient(AsyncClient):
+    def __init__(self, verify: bool = False, limit: int = 100, keep_alive: bool = True) -> None:
+        """A minimal HTTP/1.1 client built on asyncio streams, used when neither aiohttp nor
+        httpx are installed.
+
+        Parameters
+        ----------
+            verify : bool
+                Verify the certificates of https urls, by default False
+
+            limit : int
+                The maximum number of idle connections kept for each host, by default 100
+
+            keep_alive : bool
+                Keep the connections open to reuse them in the next requests, by default True
+        """
+        self.ssl_context = ssl.create_default_context()
+        if not verify:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+        self.limit = limit
+        self.keep_alive = keep_alive
+        self.idle_connections: Dict[Tuple[str, int], List[Connection]] = {}
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[bytes] = None,
+    ) -> HttpResponse:
+        parts = urlsplit(url)
+        is_https = parts.scheme == "https"
+        address = (parts.hostname or "", parts.port or (443 if is_https else 80))
+        request = _build_request(method, parts, headers, params, body, self.keep_alive)
+        idle = self.idle_connections.setdefault(address, [])
+        while idle:
+            # The server may have closed an idle connection, so it's replaced by a new one
+            reader, writer = idle.pop()
+            try:
+                return await self._send(address, reader, writer, request, method)
+            except (ConnectionError, IndexError, asyncio.IncompleteReadError):
+                continue
+        reader, writer = await asyncio.open_connection(
+            *address, ssl=self.ssl_context if is_https else None
+        )
+        return await self._send(address, reader, writer, request, method)
+
+    async def _send(
+        self,
+        address: Tuple[str, int],
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        request: bytes,
+        method: str,
+    ) -> HttpResponse:
+        try:
+            writer.write(request)
+            await writer.drain()
+            response = await _read_response(reader, method)
+        except BaseException:
+            writer.close()
+            raise
+        idle = self.idle_connections[address]
+        reusable = response.headers.get("connection", "").lower() != "close"
+        if self.keep_alive and reusable and not reader.at_eof() and len(idle) < self.limit:
+            idle.append((reader, writer))
+        else:
+            writer.close()
+        return response
+
+    async def close(self) -> None:
+        for connections in self.idle_connections.values():
+            for _, writer in connections:
+                writer.close()
+        self.idle_connections.clear()
+
+
+def _build_request(
+    method: str,
+    parts: SplitResult,
+    headers: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    body: Optional[bytes] = None,
+    keep_alive: bool = True,
+) -> bytes:
+    query = "&".join(filter(None, (parts.query, urlencode(params or {}, doseq=True))))
+    target = (parts.path or "/") + (f"?{query}" if query else "")
+    request_headers = {"Host": parts.netloc, "Connection": "keep-alive" if keep_alive else "close"}
+    if body is not None:
+        request_headers["Content-Length"] = str(len(body))
+    request_headers.update(headers or {})
+    lines = [f"{method} {target} HTTP/1.1"]
+    lines.extend(f"{name}: {value}" for name, value in request_headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+
+async def _read_response(reader: asyncio.StreamReader, method: str) -> HttpResponse:
+    status_line = await reader.readline()
+    status_code = int(status_line.split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if method == "HEAD" or status_code in (204, 304) or status_code < 200:
+        content = b""
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        content = await _read_chunks(reader)
+    elif "content-length" in headers:
+        content = await reader.readexactly(int(headers["content-length"]))
+    else:
+        content = await reader.read()
+    return HttpResponse(status_code, content, headers)
+
+
+async def _read_chunks(reader: asyncio.StreamReader) -> bytes:
+    chunks = []
+    while size := int((await reader.readline()).split(b";")[0], 16):
+        chunks.append(await reader.readexactly(size))
+        await reader.readline()
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass
+    return b"".join(chunks)
+
+
+ASYNC_CLIENTS: Dict[str, Callable[..., AsyncClient]] = {
+    "aiohttp": AiohttpClient,
+    "httpx": HttpxClient,
+    "asyncio": AsyncioClient,
+}
+
+CLIENT_LIBRARIES: Dict[str, Any] = {"aiohttp": aiohttp, "httpx": httpx, "asyncio": asyncio}
+
+
+def get_async_client(
+    name: str = "",
+    verify: bool = False,
+    limit: int = 100,
+    keep_alive: bool = True,
+) -> AsyncClient:
+    """Create the client used to send the requests from an event loop
+
+    Parameters
+    ----------
+        name : str
+            One of aiohttp, httpx or asyncio. If empty, the first one installed is used, in that
+            order, by default ""
+
+        verify : bool
+            Verify the certificates of https urls, by default False
+
+        limit : int
+            The maximum number of connections, by default 100
+
+        keep_alive : bool
+            Keep the connections open to reuse them in the next requests, by default True
+
+    Returns
+    -------
+        AsyncClient
+            The client, to be used as an async context manager
+    """
+    if not name:
+        name = next(name for name, library in CLIENT_LIBRARIES.items() if library is not None)
+    if name not in ASYNC_CLIENTS:
+        raise ValueError(f"{name} is not supported, use one of {', '.join(ASYNC_CLIENTS)}")
+    if CLIENT_LIBRARIES[name] is None:
+        raise ImportError(f"{name} is needed to use the {name} client")
+    return ASYNC_CLIENTS[name](verify=verify, limit=limit, keep_alive=keep_alive)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .histogram import LatencyHistogram
+
+DEFAULT_THRESHOLDS: Dict[float, float] = {50: 0.05, 90: 0.1, 99: 0.2}
+
+
+class PercentileDelta(NamedTuple):
+    percentile: float
+    current: float
+    new: float
+    delta: float
+    low: float
+    high: float
+    threshold: float
+    regression: bool
+
+
+class RegressionReport(NamedTuple):
+    deltas: Tuple[PercentileDelta, ...]
+    p_value: float
+    regression: bool
+    compared: int = 0
+    mismatches: int = 0
+
+    def exit_code(self, fail_on_mismatch: bool = False) -> int:
+        return int(self.regression or (fail_on_mismatch and self.mismatches > 0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "regression": self.regression,
+            "p_value": self.p_value,
+            "compared": self.compared,
+            "mismatches": self.mismatches,
+            "percentiles": [delta._asdict() for delta in self.deltas],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+
+def check_regression(
+    current: LatencyHistogram,
+    new: LatencyHistogram,
+    thresholds: Optional[Dict[float, float]] = None,
+    confidence: float = 0.95,
+    resamples: int = 1000,
+    seed: Optional[int] = None,
+    compared: int = 0,
+    mismatches: int = 0,
+) -> RegressionReport:
+    """Tell if the new service is slower than the current one. A percentile regresses when the
+    whole confidence interval of its relative increase is above its threshold, so noise alone
+    doesn't fail the check.
+
+    Parameters
+    ----------
+        current : LatencyHistogram
+            The execution times of the service used as reference
+
+        new : LatencyHistogram
+            The execution times of the service to validate
+
+        thresholds : Optional[Dict[float, float]]
+            The relative increase allowed for each percentile, like {99: 0.2} to allow a p99
+            20% slower. If None, DEFAULT_THRESHOLDS is used, by default None
+
+        confidence : float
+            The confidence level of the bootstrap intervals, by default 0.95
+
+        resamples : int
+            The number of bootstrap resamples of each histogram, by default 1000
+
+        seed : Optional[int]
+            The seed of the resamples, by default None
+
+        compared : int
+            The number of compared responses, reported as is, by default 0
+
+        mismatches : int
+            The number of responses that didn't match, reported as is, by default 0
+
+    Returns
+    -------
+        RegressionReport
+            The delta of each percentile with its interval, the one-sided Mann-Whitney p-value
+            of the new service being slower and the verdict
+    """
+    if not current.count or not new.count:
+        raise ValueError("Both histograms need execution times to be compared")
+    thresholds = DEFAULT_THRESHOLDS if thresholds is None else thresholds
+    percentiles = list(thresholds)
+    rng = np.random.default_rng(seed)
+    current_samples = _resample_percentiles(current, percentiles, resamples, rng)
+    new_samples = _resample_percentiles(new, percentiles, resamples, rng)
+    sample_deltas = new_samples / np.maximum(current_samples, current.unit) - 1
+    alpha = 1 - confidence
+    lows, highs = np.quantile(sample_deltas, [alpha / 2, 1 - alpha / 2], axis=0)
+    deltas = []
+    for percentile, low, high in zip(percentiles, lows, highs):
+        current_value, new_value = current.percentile(percentile), new.percentile(percentile)
+        threshold = thresholds[percentile]
+        deltas.append(
+            PercentileDelta(
+                percentile=percentile,
+                current=current_value,
+                new=new_value,
+                delta=new_value / max(current_value, current.unit) - 1,
+                low=float(low),
+                high=float(high),
+                threshold=threshold,
+                regression=bool(low > threshold),
+            )
+        )
+    return RegressionReport(
+        deltas=tuple(deltas),
+        p_value=mann_whitney(current, new),
+        regression=any(delta.regression for delta in deltas),
+        compared=compared,
+        mismatches=mismatches,
+    )
+
+
+def _resample_percentiles(
+    histogram: LatencyHistogram,
+    percentiles: Iterable[float],
+    resamples: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    # Resampling the values with replacement is drawing the bucket counts from a multinomial
+    values, counts = histogram.buckets()
+    samples = rng.multinomial(histogram.count, counts / histogram.count, size=resamples)
+    cumulative = samples.cumsum(axis=1)
+    ranks = np.maximum(np.ceil(np.asarray(list(percentiles)) / 100 * histogram.count), 1)
+    return values[np.stack([np.searchsorted(row, ranks) for row in cumulative])]
+
+
+def mann_whitney(current: LatencyHistogram, new: LatencyHistogram) -> float:
+    """The one-sided p-value of the Mann-Whitney U test, where the alternative is that the new
+    execution times tend to be higher. The values of a bucket are ranked as ties.
+
+    Parameters
+    ----------
+        current : LatencyHistogram
+            The execution times of the service used as reference
+
+        new : LatencyHistogram
+            The execution times of the service to validate, created with the same settings
+
+    Returns
+    -------
+        float
+            The probability of seeing a U as high if both services were as fast
+    """
+    if current.counts.shape != new.counts.shape:
+        raise ValueError("Only histograms created with the same settings can be compared")
+    current_counts = current.counts.astype(float)
+    new_counts = new.counts.astype(float)
+    ties = current_counts + new_counts
+    total = ties.sum()
+    if not current.count or not new.count or total < 2:
+        return 1.0
+    mid_ranks = np.cumsum(ties) - (ties - 1) / 2
+    u = float((new_counts * mid_ranks).sum()) - new.count * (new.count + 1) / 2
+    mean = current.count * new.count / 2
+    tie_correction = float((ties**3 - ties).sum()) / (total * (total - 1))
+    variance = current.count * new.count / 12 * (total + 1 - tie_correction)
+    if variance <= 0:
+        return 1.0
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
@@ -11,6 +11,7 @@ requirements = [
     "Jinja2",
     "requests",
     "deepdiff[optimize]",
+    "numpy",
     "types-requests",
 ]
 
@@ -46,6 +47,7 @@ setup(
         ],
     },
     install_requires=requirements,
+    extras_require={"pyarrow": ["pyarrow"]},
     license="MIT license",
     long_description=Path("README.rst").read_text(),
     long_description_content_type="text/x-rst",
@@ -6,20 +6,22 @@ from typing import Tuple
 
 import django
 from django.conf import settings
+import pytest
 
 from bfet.testing.compare_services import ServiceRequest
 
 
+@pytest.fixture
 def mock_service_requests() -> Tuple[ServiceRequest, ServiceRequest]:
     service_request1 = ServiceRequest(
         start_datetime=datetime(2023, 10, 15, 13, 23, 46, 252402),
         execution_time=382.17878341674805,
-        response="",
+        body=b"",
     )
     service_request2 = ServiceRequest(
         start_datetime=datetime(2023, 10, 15, 13, 23, 46, 251536),
         execution_time=387.10975646972656,
-        response="",
+        body=b"",
     )
     return service_request1, service_request2
 
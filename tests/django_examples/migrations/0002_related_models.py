@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_examples", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="M2MTestingModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("name", models.CharField(max_length=32)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RelatedTestingModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "fk_test",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="django_examples.fktestingmodel",
+                    ),
+                ),
+                (
+                    "o2o_test",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="o2o_related",
+                        to="django_examples.m2mtestingmodel",
+                    ),
+                ),
+                (
+                    "m2m_test",
+                    models.ManyToManyField(blank=True, to="django_examples.m2mtestingmodel"),
+                ),
+                (
+                    "parent",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="django_examples.relatedtestingmodel",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="NestedTestingModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "related_test",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="django_examples.relatedtestingmodel",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -15,10 +15,43 @@ class FKTestingModel(models.Model):
     datetime_test = models.DateTimeField()
 
 
-# class M2MTestingModel(models.Model):
-#     name = models.CharField(
-#         max_length=32,
-#     )
+class M2MTestingModel(models.Model):
+    name = models.CharField(
+        max_length=32,
+    )
+
+
+class RelatedTestingModel(models.Model):
+    fk_test = models.ForeignKey(
+        FKTestingModel,
+        on_delete=models.CASCADE,
+    )
+    o2o_test = models.OneToOneField(
+        M2MTestingModel,
+        on_delete=models.CASCADE,
+        related_name="o2o_related",
+    )
+    m2m_test = models.ManyToManyField(
+        M2MTestingModel,
+        blank=True,
+    )
+    parent = models.ForeignKey(
+        "self",
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+    )
+
+
+class NestedTestingModel(models.Model):
+    related_test = models.ForeignKey(
+        RelatedTestingModel,
+        on_delete=models.CASCADE,
+    )
+
+
+class EmptyTestingModel(models.Model):
+    pass
 
 
 # class TestingModel(models.Model):
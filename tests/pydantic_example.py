@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Annotated, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field, PositiveInt
+from pydantic import BaseModel, Field, PositiveInt, field_validator
 
 
 def default_factory():
@@ -16,3 +19,47 @@ class BaseTestModel(BaseModel):
     tastes: dict[str, PositiveInt]
     default_function: int = Field(default_factory=default_factory)
     default_value: int = Field(alias="DefaultValueAlias", default=33)
+
+
+class Color(Enum):
+    RED = "red"
+    BLUE = "blue"
+
+
+class NestedTestModel(BaseModel):
+    base: BaseTestModel
+    children: List[BaseTestModel]
+    color: Color
+    kind: Literal["a", "b"]
+    small: Annotated[int, Field(ge=1, le=3)]
+    short: Annotated[str, Field(min_length=2, max_length=4)]
+    price: Decimal = Field(max_digits=5, decimal_places=2)
+    tags: Optional[Dict[str, List[float]]] = None
+
+
+class TreeTestModel(BaseModel):
+    value: int
+    child: Optional[TreeTestModel] = None
+
+
+class OwnerTestModel(BaseModel):
+    pet: Optional[PetTestModel] = None
+    value: int
+
+
+class PetTestModel(BaseModel):
+    owner: OwnerTestModel
+
+
+class UpperTestModel(BaseModel):
+    name: str
+
+    @field_validator("name")
+    @classmethod
+    def upper(cls, value: str) -> str:
+        return value.upper()
+
+
+class ParentTestModel(BaseModel):
+    child: UpperTestModel
+    children: List[UpperTestModel]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from itertools import combinations, product
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from bfet.create_data.covering_array import create_covering_array
+from bfet.create_data.data_combination import create_possibilities
+from bfet.create_data.data_factory import DataFactory
+
+
+def covered(cases: List[Tuple[Any, ...]], parameters: Tuple[int, ...]) -> set:
+    return {tuple(case[p] for p in parameters) for case in cases}
+
+
+@pytest.mark.parametrize("strength", [1, 2, 3])
+def test_create_covering_array_covers_every_interaction(strength: int):
+    data = {f"field{i}": list(range(3 + i % 2)) for i in range(7)}
+    cases = create_covering_array(data, strength, factory=DataFactory(seed=1))
+    values = list(data.values())
+    for parameters in combinations(range(len(data)), strength):
+        assert covered(cases, parameters) == set(product(*(values[p] for p in parameters)))
+    assert len(cases) < len(create_possibilities(data)) / 10
+
+
+def test_create_covering_array_with_constraints():
+    data: Dict[str, List[Any]] = {
+        "browser": ["chrome", "firefox", "safari"],
+        "os": ["linux", "mac", "windows"],
+        "user": [None, "admin", "guest"],
+        "cache": [True, False],
+    }
+    constraints = [lambda case: not (case.get("browser") == "safari" and case.get("os") != "mac")]
+    cases = create_covering_array(data, constraints=constraints, factory=DataFactory(seed=1))
+    assert all(constraints[0](dict(zip(data, case))) for case in cases)
+    pairs = covered(cases, (0, 1))
+    assert ("safari", "mac") in pairs and ("safari", "linux") not in pairs
+    assert ("firefox", "windows") in pairs
+    assert covered(cases, (2, 3)) == set(product(data["user"], data["cache"]))
+
+
+def test_create_covering_array_skips_interactions_without_cases():
+    data = {"p0": [0], "p1": [0, 1, 2], "p2": [0]}
+    constraints = [lambda case: not (case.get("p0") == 0 and case.get("p1") == 1)]
+    cases = create_covering_array(data, constraints=constraints, factory=DataFactory(seed=1))
+    assert sorted(cases) == [(0, 0, 0), (0, 2, 0)]
+
+
+def test_create_covering_array_with_seed_and_high_strength():
+    data = {"field1": [["cool"], ["very", "cool"]], "field2": ["hey", None], "field3": [1, 2, 3]}
+    first, second = (create_covering_array(data, factory=DataFactory(seed=3)) for _ in range(2))
+    assert first == second
+    assert sorted(map(str, create_covering_array(data, 5))) == sorted(
+        map(str, create_possibilities(data))
+    )
+    with pytest.raises(ValueError):
+        create_covering_array(data, 0)
+    with pytest.raises(ValueError):
+        create_covering_array({"field1": []})
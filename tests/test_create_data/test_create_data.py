@@ -4,14 +4,21 @@ from __future__ import annotations
 import datetime
 import uuid
 
+import numpy as np
+import pytest
+
 from bfet.create_data.create_data import (
     create_random_bool,
+    create_random_bools,
     create_random_date,
     create_random_datetime,
+    create_random_datetimes,
     create_random_email,
     create_random_float,
+    create_random_floats,
     create_random_hour,
     create_random_integer,
+    create_random_integers,
     create_random_json,
     create_random_list,
     create_random_negative_float,
@@ -20,10 +27,15 @@ from bfet.create_data.create_data import (
     create_random_positive_integer,
     create_random_slug,
     create_random_string,
+    create_random_strings,
     create_random_text,
+    create_random_texts,
     create_random_url,
     create_random_uuid,
+    create_random_uuids,
 )
+from bfet.create_data.create_file import BatchFormat, create, iter_rows
+from bfet.create_data.data_factory import DataFactory
 
 
 def test_create_random_list():
@@ -100,3 +112,149 @@ def test_create_random_positive_float():
 
 def test_create_random_negative_float():
     assert isinstance((create_random_negative_float()), float)
+
+
+def test_create_random_strings():
+    result = create_random_strings(10, max_value=20)
+    assert len(result) == 10
+    assert all(isinstance(value, str) and len(value) == 20 for value in result)
+
+
+def test_create_random_integers():
+    result = create_random_integers(1000, min_value=5, max_value=10)
+    assert isinstance(result, np.ndarray)
+    assert len(result) == 1000
+    assert all(5 <= abs(value) <= 10 for value in result)
+
+
+def test_create_random_floats():
+    result = create_random_floats(100, max_value=1.0)
+    assert isinstance(result, np.ndarray)
+    assert all(-1.0 <= value <= 1.0 for value in result)
+
+
+def test_create_random_bools():
+    result = create_random_bools(100)
+    assert result.dtype == bool
+    assert len(result) == 100
+
+
+def test_create_random_datetimes():
+    result = create_random_datetimes(100)
+    assert all(isinstance(value, datetime.datetime) for value in result)
+
+
+def test_create_random_uuids():
+    result = create_random_uuids(5)
+    assert all(isinstance(value, uuid.UUID) and value.version == 4 for value in result)
+    assert len(set(result)) == 5
+
+
+def test_create_csv(tmp_path):
+    filename = tmp_path / "data.csv"
+    create(str(filename), {"number": {"type": "int"}, "text": {"type": "str"}}, num_rows=1234)
+    assert len(filename.read_text().splitlines()) == 1235
+
+
+def test_create_csv_in_parallel(tmp_path):
+    columns = {"number": {"type": "int"}, "date": {"type": "datetime"}}
+    for name in ("first.csv", "second.csv"):
+        create(str(tmp_path / name), columns, 1001, 100, 3, DataFactory(seed=7))
+    first = (tmp_path / "first.csv").read_text()
+    assert first == (tmp_path / "second.csv").read_text()
+    assert len(first.splitlines()) == 1002
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["first.csv", "second.csv"]
+
+
+def test_data_factory_same_seed_same_data():
+    first, second = DataFactory(seed=42), DataFactory(seed=42)
+    assert create_random_strings(5, factory=first) == create_random_strings(5, factory=second)
+    assert create_random_datetime(factory=first) == create_random_datetime(factory=second)
+    assert create_random_uuid(factory=first) == create_random_uuid(factory=second)
+
+
+def test_data_factory_spawn():
+    first, second = DataFactory(seed=42).spawn(2)
+    again = DataFactory(seed=42).spawn(2)
+    assert (
+        [child.spawn_key for child in again] == [first.spawn_key, second.spawn_key] == [(0,), (1,)]
+    )
+    assert create_random_strings(5, factory=first) == create_random_strings(5, factory=again[0])
+    assert create_random_strings(5, factory=first) != create_random_strings(5, factory=second)
+    copy = DataFactory(np.random.SeedSequence(second.seed, spawn_key=second.spawn_key))
+    assert create_random_strings(5, factory=again[1]) == create_random_strings(5, factory=copy)
+
+
+@pytest.mark.parametrize("kind", [1, 3, 4, 5])
+def test_seeded_uuids_and_texts(kind: int):
+    first, second = DataFactory(seed=1), DataFactory(seed=1)
+    first_uuid, second_uuid = create_random_uuid(kind, first), create_random_uuid(kind, second)
+    assert first_uuid == second_uuid and first_uuid.version == kind
+    assert create_random_texts(5, 30, first) == create_random_texts(5, 30, second)
+    assert len(set(create_random_texts(20, 30, first))) > 1
+    assert all(len(text) <= 30 for text in create_random_texts(20, 30, first))
+
+
+COLUMNS = {
+    "number": {"type": "int", "max_value": 10},
+    "text": {"type": "str"},
+    "date": {"type": "datetime"},
+    "json": {"type": "dict"},
+}
+
+
+def test_create_npz(tmp_path):
+    filename = tmp_path / "data.npz"
+    create(str(filename), COLUMNS, num_rows=250, batch_size=100)
+    data = np.load(filename)
+    assert sorted(data.files) == sorted(COLUMNS)
+    assert len(data["number"]) == 250
+    assert np.abs(data["number"]).max() <= 10
+    assert data["date"].dtype == np.dtype("datetime64[us]")
+
+
+def test_create_npy(tmp_path):
+    filename = tmp_path / "data.npy"
+    create(str(filename), COLUMNS, num_rows=250, batch_size=100)
+    data = np.load(filename)
+    assert data.dtype.names == tuple(COLUMNS)
+    assert len(data) == 250
+
+
+@pytest.mark.parametrize("num_rows", [250, 0])
+@pytest.mark.parametrize("extension", ["parquet", "arrow"])
+def test_create_pyarrow_files(tmp_path, extension: str, num_rows: int):
+    pa = pytest.importorskip("pyarrow")
+    filename = tmp_path / f"data.{extension}"
+    create(str(filename), COLUMNS, num_rows=num_rows, batch_size=100)
+    if extension == "parquet":
+        table = pytest.importorskip("pyarrow.parquet").read_table(filename)
+    else:
+        table = pa.ipc.open_file(str(filename)).read_all()
+    assert table.column_names == list(COLUMNS)
+    assert table.num_rows == num_rows
+    assert str(table.schema.field("date").type).startswith("timestamp")
+
+
+def test_create_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        create(str(tmp_path / "data.xlsx"), COLUMNS, num_rows=10)
+
+
+def test_iter_rows():
+    batches = iter_rows(COLUMNS, num_rows=250, batch_size=100)
+    assert not isinstance(batches, list)
+    sizes = [len(batch) for batch in batches]
+    assert sizes == [100, 100, 50]
+
+
+def test_iter_rows_dicts():
+    batch = next(iter_rows(COLUMNS, num_rows=10, batch_format=BatchFormat.DICTS))
+    assert len(batch) == 10
+    assert all(set(row) == set(COLUMNS) for row in batch)
+
+
+def test_iter_rows_columns():
+    batch = next(iter_rows(COLUMNS, num_rows=10, batch_format=BatchFormat.COLUMNS))
+    assert isinstance(batch["number"], np.ndarray)
+    assert all(len(values) == 10 for values in batch.values())
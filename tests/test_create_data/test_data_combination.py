@@ -1,18 +1,23 @@
 from __future__ import annotations
 
 from collections import deque
-from itertools import chain, product
+from itertools import chain, combinations, product
 from typing import Any, List
 
 import pytest
 
 from bfet.create_data.data_combination import (
+    CombinationMatrix,
+    CombinationSequence,
     Combinator,
+    IndexedSequence,
+    ProductSequence,
     Variations,
     cast_all_combinations,
     create_all_combinations,
     create_possibilities,
 )
+from bfet.create_data.data_factory import DataFactory
 
 
 @pytest.mark.parametrize(
@@ -39,6 +44,38 @@ def test_combinator_value(variation: Variations, expected_result: List[Any]):
     assert low <= len(result["combi"]) <= high
 
 
+def test_combinator_value_with_seed():
+    values = [
+        Combinator(
+            name="combi",
+            options=[1, 2, 3, 4],
+            variations=Variations.SOME,
+            number_of_variations=5,
+            factory=DataFactory(seed=3),
+        ).value()
+        for _ in range(2)
+    ]
+    assert values[0] == values[1]
+
+
+@pytest.mark.parametrize("variation", [Variations.SOME, Variations.ANY])
+def test_combinator_value_with_many_options(variation: Variations):
+    options = list(range(64))
+    result = Combinator(
+        name="combi",
+        options=options,
+        variations=variation,
+        number_of_variations=100,
+        can_be_empty=False,
+        factory=DataFactory(seed=1),
+    ).value()["combi"]
+    assert len(result) <= 1024
+    assert all(combination and list(combination) == sorted(combination) for combination in result)
+    assert all(set(combination) <= set(options) for combination in result)
+    if variation == Variations.SOME:
+        assert len(result) == 100 and len(set(result)) == 100
+
+
 @pytest.mark.parametrize("cast_to", [list, deque, tuple])
 def test_cast_all_combinations(cast_to):
     result = cast_all_combinations([["cool"], ["very", "cool"]], cast_to=cast_to)
@@ -47,7 +84,8 @@ def test_cast_all_combinations(cast_to):
 
 def test_create_all_combinations():
     result = create_all_combinations([["cool"], ["very", "cool"]], minimum=0)
-    assert isinstance(result, chain)
+    assert isinstance(result, CombinationSequence)
+    assert len(result) == 4
     assert list(result) == [(), (["cool"],), (["very", "cool"],), (["cool"], ["very", "cool"])]
 
 
@@ -58,7 +96,8 @@ def test_create_possibilities():
         "field3": [1, 2, 3],
     }
     result = create_possibilities(options)
-    assert isinstance(result, product)
+    assert isinstance(result, ProductSequence)
+    assert len(result) == 12
     assert list(result) == [
         (["cool"], "hey", 1),
         (["cool"], "hey", 2),
@@ -73,3 +112,175 @@ def test_create_possibilities():
         (["very", "cool"], None, 2),
         (["very", "cool"], None, 3),
     ]
+
+
+@pytest.mark.parametrize("minimum", [0, 1, 3])
+def test_create_all_combinations_by_index(minimum: int):
+    data = list("abcdefg")
+    expected = list(chain.from_iterable(combinations(data, i) for i in range(minimum, 8)))
+    result = create_all_combinations(data, minimum=minimum)
+    assert [result[i] for i in range(len(result))] == expected
+    assert result[-1] == expected[-1]
+    assert list(result[1::3]) == expected[1::3] and list(result[::-2]) == expected[::-2]
+    assert len(result[5:]) == len(expected) - 5
+    with pytest.raises(IndexError):
+        result[len(expected)]
+
+
+def test_create_possibilities_by_index():
+    options = {"field1": [1, 2, 3], "field2": ["a", "b"], "field3": [None, True, False, 0]}
+    expected = list(product(*options.values()))
+    result = create_possibilities(options)
+    assert [result[i] for i in range(len(result))] == expected
+    shards = [result[worker::3] for worker in range(3)]
+    assert sorted(chain.from_iterable(shards), key=expected.index) == expected
+
+
+def test_huge_sequences_are_lazy():
+    result = create_all_combinations(range(100))
+    assert result.size == 2**100 - 1
+    assert result[0] == (0,) and result[-1] == tuple(range(100))
+    assert result[result.size // 2 :][0] == result[result.size // 2]
+    possibilities = create_possibilities({f"field{i}": range(10) for i in range(30)})
+    assert possibilities[-1] == (9,) * 30
+
+
+def test_indexed_sequence_needs_size_and_item():
+    class Incomplete(IndexedSequence):
+        def _item(self, i: int) -> int:
+            return i
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_combinator_excluded_combinations():
+    combinator = Combinator(
+        name="combi",
+        options=[["cool"], ["very", "cool"], "hey"],
+        excluded_combinations=[
+            [["very", "cool"], ["cool"]],
+            lambda combination: "hey" in combination and len(combination) > 1,
+            ["unknown"],
+        ],
+    )
+    assert combinator.value()["combi"] == [(), (["cool"],), (["very", "cool"],), ("hey",)]
+
+
+@pytest.mark.parametrize("variation", [Variations.SOME, Variations.ANY])
+def test_combinator_samples_without_excluded_combinations(variation: Variations):
+    excluded = [(1,), (2,), (1, 2)]
+    result = Combinator(
+        name="combi",
+        options=[1, 2, 3],
+        variations=variation,
+        number_of_variations=50,
+        can_be_empty=False,
+        excluded_combinations=[*excluded, lambda combination: sum(combination) == 4],
+        factory=DataFactory(seed=1),
+    ).value()["combi"]
+    assert set(result) <= {(3,), (2, 3), (1, 2, 3)}
+    with pytest.raises(ValueError):
+        Combinator(
+            name="combi",
+            options=[1],
+            variations=Variations.SOME,
+            number_of_variations=1,
+            excluded_combinations=[[], [1]],
+        ).value()
+
+
+@pytest.mark.parametrize("variation", [Variations.SOME, Variations.ANY])
+def test_combinator_samples_sparse_allowed_combinations(variation: Variations):
+    result = Combinator(
+        name="combi",
+        options=list(range(16)),
+        variations=variation,
+        number_of_variations=5,
+        can_be_empty=False,
+        excluded_combinations=[lambda combination: combination != (3, 7)],
+        factory=DataFactory(seed=1),
+    ).value()["combi"]
+    assert set(result) <= {(3, 7)}
+    with pytest.raises(ValueError, match="Every combination is excluded"):
+        Combinator(
+            name="combi",
+            options=[1],
+            variations=Variations.ANY,
+            can_be_empty=False,
+            number_of_variations=1,
+            excluded_combinations=[[1]],
+        ).value()
+
+
+def matrix() -> CombinationMatrix:
+    return CombinationMatrix(
+        [
+            Combinator(name="colors", options=["red", "blue"]),
+            Combinator(
+                name="sizes",
+                options=[1, 2, 3],
+                variations=Variations.SOME,
+                number_of_variations=20,
+                can_be_empty=False,
+                factory=DataFactory(seed=1),
+            ),
+            Combinator(name="tags", options=["a"], variations=Variations.EMPTY),
+        ]
+    )
+
+
+def test_combination_matrix_cases():
+    cases = matrix()
+    assert len(cases) == 4 * 7
+    assert len(set(cases.cases)) == len(cases)
+    first = next(iter(cases))
+    assert list(first) == ["colors", "sizes", "tags"] and first["tags"] == ()
+    with pytest.raises(ValueError):
+        CombinationMatrix([Combinator(name="colors", options=[1])] * 2)
+
+
+def test_combination_matrix_with_many_options():
+    cases = CombinationMatrix(
+        [
+            Combinator(name="colors", options=["red", "blue"]),
+            Combinator(name="big", options=list(range(70))),
+        ]
+    ).cases
+    assert cases.size == 4 * 2**70
+    assert cases[-1] == (("red", "blue"), tuple(range(70)))
+
+
+def test_combination_matrix_without_allowed_combinations():
+    combinator = Combinator(name="c", options=[1], excluded_combinations=[[], [1]])
+    with pytest.raises(ValueError, match="Every combination is excluded"):
+        list(CombinationMatrix([combinator]))
+
+
+def test_combination_matrix_shard(monkeypatch: pytest.MonkeyPatch):
+    cases = matrix()
+    shards = [cases.shard(worker, 3) for worker in range(3)]
+    assert sum(len(shard) for shard in shards) == len(cases)
+    assert set(chain.from_iterable(shards)) == set(cases.cases)
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw1")
+    monkeypatch.setenv("PYTEST_XDIST_WORKER_COUNT", "3")
+    assert list(cases.shard()) == list(shards[1])
+    with pytest.raises(ValueError):
+        cases.shard(3, 3)
+
+
+MATRIX = matrix()
+
+
+@MATRIX.parametrize(worker=0, workers=2)
+def test_combination_matrix_parametrize(
+    colors: tuple, sizes: tuple, tags: tuple, request: pytest.FixtureRequest
+):
+    assert set(colors) <= {"red", "blue"}
+    assert sizes and set(sizes) <= {1, 2, 3}
+    assert tags == ()
+    expected_id = "-".join(
+        "+".join(map(str, values)) or "empty" for values in (colors, sizes, tags)
+    )
+    assert request.node.callspec.id == expected_id
+    assert (colors, sizes, tags) in MATRIX.shard(0, 2)
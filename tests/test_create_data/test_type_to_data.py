@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import Annotated, Dict, List, Literal, Optional, Tuple
+
+from annotated_types import Gt, Len, Lt
+from pydantic import Field, TypeAdapter
+import pytest
+
+from bfet.create_data.data_factory import DataFactory
+from bfet.create_data.map_types.type_to_data import compile_type, map_type_to_data
+
+
+class Size(Enum):
+    SMALL = 1
+    BIG = 2
+
+
+@pytest.mark.parametrize(
+    "type_, expected_type",
+    [
+        ("int", int),
+        ("str", str),
+        (float, float),
+        (date, date),
+        (List[int], list),
+        (Dict[str, float], dict),
+        (Tuple[int, str], tuple),
+        (Size, Size),
+    ],
+)
+def test_map_type_to_data(type_, expected_type):
+    assert isinstance(map_type_to_data(type_), expected_type)
+
+
+def test_compile_type_constraints():
+    generator = compile_type(Annotated[List[Annotated[int, Gt(5)]], Len(2, 3)])
+    values = [generator(None) for _ in range(100)]
+    assert all(2 <= len(value) <= 3 for value in values)
+    assert all(item > 5 for value in values for item in value)
+
+
+def test_compile_type_literal():
+    generator = compile_type(Literal["a", "b"])
+    assert {generator(None) for _ in range(100)} == {"a", "b"}
+
+
+def test_compile_type_optional():
+    assert compile_type(Optional[int], fill_all_fields=False)(None) is None
+    assert isinstance(compile_type(Optional[int])(None), int)
+
+
+def test_compile_type_with_seed():
+    generator = compile_type(Dict[str, List[date]])
+    assert generator(DataFactory(seed=5)) == generator(DataFactory(seed=5))
+
+
+@pytest.mark.parametrize(
+    "field",
+    [
+        Field(gt=0, max_digits=6, decimal_places=2),
+        Field(lt=-1, max_digits=6, decimal_places=2),
+        Field(gt=Decimal("0.5"), lt=Decimal("0.6"), max_digits=3, decimal_places=2),
+        Field(gt=-(10**9), max_digits=4, decimal_places=1),
+    ],
+)
+def test_compile_type_decimal_bounds(field):
+    type_ = Annotated[Decimal, field]
+    generator, adapter = compile_type(type_), TypeAdapter(type_)
+    assert all(adapter.validate_python(generator(None)) is not None for _ in range(200))
+
+
+def test_compile_type_decimal_without_digits():
+    generator = compile_type(Annotated[Decimal, Gt(Decimal("0.5")), Lt(2)])
+    assert all(Decimal("0.5") < generator(None) < 2 for _ in range(100))
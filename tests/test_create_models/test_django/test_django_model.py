@@ -1,8 +1,16 @@
 from __future__ import annotations
 
+from unittest.mock import patch
+
 import pytest
 
-from ...django_examples.models import FKTestingModel
+from ...django_examples.models import (
+    EmptyTestingModel,
+    FKTestingModel,
+    M2MTestingModel,
+    NestedTestingModel,
+    RelatedTestingModel,
+)
 from bfet.create_models.django_model import DjangoTestingModel
 
 
@@ -36,3 +44,101 @@ class TestDjangoTestingModel:
     def test_max_lenght(self):
         new_obj: FKTestingModel = DjangoTestingModel.create(FKTestingModel)
         assert len(new_obj.name) <= 32
+
+    def test_field_plans_are_compiled_once(self):
+        DjangoTestingModel.invalidate_field_plans()
+        with patch.object(
+            DjangoTestingModel,
+            "_compile_field",
+            wraps=DjangoTestingModel(FKTestingModel, 1, False, True, False)._compile_field,
+        ) as compile_field:
+            DjangoTestingModel.create_many(FKTestingModel, quantity=3)
+        assert compile_field.call_count == len(FKTestingModel._meta.fields) - 1
+        assert FKTestingModel in DjangoTestingModel._field_plans
+
+    def test_invalidate_field_plans(self):
+        DjangoTestingModel.create(FKTestingModel)
+        DjangoTestingModel.invalidate_field_plans(FKTestingModel)
+        assert FKTestingModel not in DjangoTestingModel._field_plans
+
+    def test_create_many_in_bulk(self, django_assert_max_num_queries):
+        with django_assert_max_num_queries(4):
+            new_objs = DjangoTestingModel.create_many(
+                FKTestingModel,
+                quantity=10,
+                in_bulk=True,
+                batch_size=5,
+            )
+        assert FKTestingModel.objects.count() == 10
+        assert all(new_obj.pk for new_obj in new_objs)
+
+    def test_create_many_in_bulk_get_or_create(self, django_assert_max_num_queries):
+        new_obj = self.create_check_model()
+        with django_assert_max_num_queries(3):
+            duplicated_objs = DjangoTestingModel.create_many(
+                FKTestingModel,
+                quantity=3,
+                in_bulk=True,
+                name="prueba",
+            )
+        assert FKTestingModel.objects.count() == 1
+        assert duplicated_objs == [new_obj] * 3
+
+    def test_create_with_relations(self):
+        new_obj: RelatedTestingModel = DjangoTestingModel.create(RelatedTestingModel)
+        assert isinstance(new_obj.fk_test, FKTestingModel)
+        assert isinstance(new_obj.o2o_test, M2MTestingModel)
+        assert new_obj.parent is None
+        assert new_obj.m2m_test.count() == 1
+
+    def test_create_many_in_bulk_with_relations(self, django_assert_max_num_queries):
+        with django_assert_max_num_queries(16):
+            new_objs = DjangoTestingModel.create_many(
+                NestedTestingModel,
+                quantity=10,
+                in_bulk=True,
+                related_pool_size=3,
+            )
+        assert len(new_objs) == 10
+        assert RelatedTestingModel.objects.count() == 3
+        assert FKTestingModel.objects.count() == 3
+        assert M2MTestingModel.objects.count() == 3
+        assert RelatedTestingModel.m2m_test.through.objects.count() == 3
+
+    def test_create_many_reuses_existing_related(self):
+        DjangoTestingModel.create_many(FKTestingModel, quantity=2, in_bulk=True)
+        DjangoTestingModel.create_many(
+            RelatedTestingModel,
+            quantity=5,
+            in_bulk=True,
+            related_pool_size=2,
+        )
+        assert FKTestingModel.objects.count() == 2
+        assert M2MTestingModel.objects.count() == 5
+
+    def test_create_keeps_fields_without_plan(self):
+        new_obj = DjangoTestingModel.create(FKTestingModel, id=42, name="prueba")
+        assert new_obj.pk == 42
+        fk_test = DjangoTestingModel.create(FKTestingModel, name="other")
+        related = DjangoTestingModel.create(RelatedTestingModel, fk_test_id=fk_test.pk)
+        assert related.fk_test == fk_test
+        assert FKTestingModel.objects.count() == 2
+
+    def test_create_model_without_fields(self):
+        assert isinstance(DjangoTestingModel.create(EmptyTestingModel), EmptyTestingModel)
+        DjangoTestingModel.create_many(EmptyTestingModel, quantity=3, in_bulk=True)
+        assert EmptyTestingModel.objects.count() == 4
+
+    @pytest.mark.parametrize("by_attname", [False, True])
+    def test_create_many_in_bulk_get_or_create_by_relation(
+        self, by_attname: bool, django_assert_max_num_queries
+    ):
+        fk_test = DjangoTestingModel.create(FKTestingModel)
+        existing = DjangoTestingModel.create(RelatedTestingModel, fk_test=fk_test)
+        kwargs = {"fk_test_id": fk_test.pk} if by_attname else {"fk_test": fk_test}
+        with django_assert_max_num_queries(6):
+            new_objs = DjangoTestingModel.create_many(
+                RelatedTestingModel, quantity=3, in_bulk=True, **kwargs
+            )
+        assert new_objs == [existing] * 3
+        assert RelatedTestingModel.objects.count() == 1
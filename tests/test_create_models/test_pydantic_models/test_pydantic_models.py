@@ -1,81 +1,139 @@
 from __future__ import annotations
 
+from datetime import datetime
+import json
 from unittest.mock import MagicMock, patch
 
-from ...pydantic_example import BaseTestModel
-from bfet.create_models.pydantic_models import PydanticTestingModel
+from pydantic import ValidationError
+import pytest
+
+from ...pydantic_example import (
+    BaseTestModel,
+    NestedTestModel,
+    OwnerTestModel,
+    ParentTestModel,
+    PetTestModel,
+    TreeTestModel,
+    UpperTestModel,
+)
+from bfet.create_data.data_factory import DataFactory
+from bfet.create_data.map_types.type_to_data import compile_type
+from bfet.create_models.pydantic_models import OutputFormat, PydanticTestingModel
 
 TestModel = PydanticTestingModel(model=BaseTestModel, fill_all_fields=False)
 
 
 def test_create():
-    PydanticTestingModel.create(BaseTestModel)
+    assert isinstance(PydanticTestingModel.create(BaseTestModel), BaseTestModel)
 
 
 def test_create_model():
     expected = {
-        "id": "",
-        "name": "",
-        "signup_ts": "",
-        "tastes": "",
+        "id": 3,
+        "name": "name",
+        "signup_ts": datetime(2023, 10, 15),
+        "tastes": {"wine": 1},
     }
     result = PydanticTestingModel(model=BaseTestModel, fill_all_fields=True)._create_model(expected)
 
     assert isinstance(result, BaseTestModel)
-    assert all(value == getattr(result, key) for key, value in expected)
+    assert all(value == getattr(result, key) for key, value in expected.items())
 
 
-def test_create_field_default():
-    field = dict(BaseTestModel.model_fields.items())["id"]
-    assert TestModel._create_field("name", field, "default") == "name", "default"
+def test_create_data_alias():
+    result = TestModel._create_data({})
+    assert result["DefaultValueAlias"] == 33
+    assert "default_value" not in result
 
 
-def test_create_field_alias():
-    field = dict(BaseTestModel.model_fields.items())["default_value"]
-    result = TestModel._create_field("name", field, "default")
-    assert result == "DefaultValueAlias", "default"
+def test_create_data_use_fields_default():
+    result = TestModel._create_data({})
+    assert result["name"] == "John Doe"
+    assert result["default_function"] == 25
+    assert result["signup_ts"] is None
 
 
-@patch("bfet.create_models.pydantic_models.PydanticTestingModel._inspect_field")
-def test_create_field(inspect_field: MagicMock):
-    field = dict(BaseTestModel.model_fields.items())["id"]
-    assert TestModel._create_field("name", field, None) == "name", inspect_field.return_value
-    inspect_field.assert_called_once_with(field)
+def test_create_data_fill_all_fields():
+    result = PydanticTestingModel(model=BaseTestModel, fill_all_fields=True)._create_data({})
+    assert isinstance(result["signup_ts"], datetime)
+    assert all(value > 0 for value in result["tastes"].values())
 
 
-@patch("bfet.create_models.pydantic_models.PydanticTestingModel._get_field_type_data")
-def test_inspect_field_use_random_data(get_field_type_data: MagicMock):
-    field = dict(BaseTestModel.model_fields.items())["id"]
-    result = TestModel._inspect_field(field)
-    get_field_type_data.assert_called_once_with("int")
-    assert result == get_field_type_data.return_value
+def test_create_many_nested_model():
+    result = PydanticTestingModel.create_many(NestedTestModel, True, 20)
+    assert len(result) == 20
+    assert all(isinstance(model.base, BaseTestModel) for model in result)
+    assert all(1 <= model.small <= 3 and 2 <= len(model.short) <= 4 for model in result)
 
 
-@patch("bfet.create_models.pydantic_models.PydanticTestingModel._get_field_type_data")
-def test_inspect_field_use_fields_default(get_field_type_data: MagicMock):
-    field = dict(BaseTestModel.model_fields.items())["default_value"]
-    result = TestModel._inspect_field(field)
-    get_field_type_data.assert_not_called()
-    assert result == 33
+def test_create_self_referencing_model():
+    result = PydanticTestingModel.create(TreeTestModel, fill_all_fields=True)
+    assert isinstance(result.value, int)
+    assert result.child is None
 
 
-@patch("bfet.create_models.pydantic_models.PydanticTestingModel._get_field_type_data")
-def test_inspect_field_use_fields_default_factory(get_field_type_data: MagicMock):
-    field = dict(BaseTestModel.model_fields.items())["default_function"]
-    result = TestModel._inspect_field(field)
-    get_field_type_data.assert_not_called()
-    assert result == 25
+@pytest.mark.parametrize("models", [(OwnerTestModel, PetTestModel), (PetTestModel, OwnerTestModel)])
+def test_create_mutually_referencing_models(models):
+    PydanticTestingModel.invalidate_field_plans()
+    first, second = (PydanticTestingModel.create(model, fill_all_fields=True) for model in models)
+    owner, pet = (first, second) if models[0] is OwnerTestModel else (second, first)
+    assert owner.pet is None
+    assert isinstance(pet.owner, OwnerTestModel) and pet.owner.pet is None
 
 
-@patch("bfet.create_data.map_types.type_to_data.map_type_to_data")
-def test_get_field_type_data_pydantic_type(map_type_to_data: MagicMock):
-    result = TestModel._get_field_type_data("PositiveInt")
-    map_type_to_data.assert_called_once_with()
-    assert isinstance(result, int)
+def test_create_many_with_seed():
+    first, second = (
+        PydanticTestingModel.create_many(NestedTestModel, True, 5, DataFactory(seed=1))
+        for _ in range(2)
+    )
+    assert first == second
 
 
-@patch("bfet.create_data.map_types.type_to_data.map_type_to_data")
-def test_get_field_type_data_generic_type(map_type_to_data: MagicMock):
-    result = TestModel._get_field_type_data("list")
-    map_type_to_data.assert_called_once_with("list")
-    assert isinstance(result, list)
+def test_create_many_without_validation():
+    with pytest.raises(ValidationError):
+        PydanticTestingModel.create_many(BaseTestModel, True, 2, id="not an int")
+    result = PydanticTestingModel.create_many(
+        BaseTestModel, True, 2, validation_fraction=0, id="not an int"
+    )
+    assert all(isinstance(model, BaseTestModel) and model.id == "not an int" for model in result)
+
+
+def test_create_many_validates_nested_models():
+    result = PydanticTestingModel.create_many(ParentTestModel, True, 20)
+    nested = [child for model in result for child in (model.child, *model.children)]
+    assert all(child.name == child.name.upper() for child in nested)
+
+
+def test_create_many_constructs_nested_models():
+    result = PydanticTestingModel.create_many(ParentTestModel, True, 5, validation_fraction=0)
+    assert all(isinstance(model.child, UpperTestModel) for model in result)
+    assert all(isinstance(child, UpperTestModel) for model in result for child in model.children)
+
+
+def test_create_many_validates_a_fraction():
+    with pytest.raises(ValidationError):
+        PydanticTestingModel.create_many(
+            BaseTestModel, True, 50, DataFactory(seed=1), validation_fraction=0.5, id="wrong"
+        )
+
+
+def test_create_many_as_dicts():
+    result = PydanticTestingModel.create_many(
+        NestedTestModel, True, 3, validation_fraction=0, output=OutputFormat.DICT
+    )
+    assert all(isinstance(data["base"], dict) for data in result)
+    assert all("DefaultValueAlias" in data["base"] for data in result)
+
+
+def test_create_many_as_json():
+    result = PydanticTestingModel.create_many(NestedTestModel, True, 3, output=OutputFormat.JSON)
+    assert all(isinstance(data, bytes) for data in result)
+    assert all(NestedTestModel.model_validate(json.loads(data)) for data in result)
+
+
+@patch("bfet.create_models.pydantic_models.compile_type", wraps=compile_type)
+def test_field_plans_are_compiled_once(compile_type: MagicMock):
+    PydanticTestingModel.invalidate_field_plans(BaseTestModel)
+    PydanticTestingModel.create_many(BaseTestModel, True, 3, id=1)
+    assert compile_type.call_count == len(BaseTestModel.model_fields)
+    PydanticTestingModel.invalidate_field_plans(BaseTestModel)
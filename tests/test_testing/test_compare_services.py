@@ -1,25 +1,298 @@
 from __future__ import annotations
 
-from typing import Tuple
+import asyncio
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+from threading import Thread
+from typing import Iterator, Tuple
 from unittest.mock import MagicMock, patch
 
-from bfet.testing.compare_services import CompareServices, Service, ServiceRequest
+import pytest
 
+from bfet.create_data.data_factory import DataFactory
+from bfet.testing.compare_services import (
+    CompareServices,
+    RateProfile,
+    ResponseComparator,
+    Service,
+    ServiceRequest,
+    _summarize,
+    main,
+    replay,
+)
+from bfet.testing.http_clients import AsyncClient, AsyncioClient, HttpResponse, get_async_client
 
-@patch("requests.get")
+
+class JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode()
+        data = {"path": self.path, "body": body} if body else {"path": self.path}
+        content = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_POST(self) -> None:
+        self.do_GET()
+
+    def log_message(self, *args) -> None:
+        return None
+
+
+class SlowClient(AsyncClient):
+    async def request(self, *args, **kwargs) -> HttpResponse:
+        await asyncio.sleep(0.02)
+        return HttpResponse(200, b"{}", {})
+
+
+@pytest.fixture(scope="module")
+def server_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JsonHandler, bind_and_activate=False)
+    server.request_queue_size = 128
+    server.server_bind()
+    server.server_activate()
+    Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@patch("requests.Session.request", return_value=MagicMock(status_code=200, content=b"{}"))
 def test_service_request(mock_get: MagicMock):
     result = Service("my/url")._request()
     assert isinstance(result, ServiceRequest)
+    assert result.cold
+    assert (result.status_code, result.size, result.body) == (200, 2, b"{}")
+
+
+@patch("requests.Session.request", return_value=MagicMock(status_code=200, content=b"{}"))
+def test_service_results_are_bounded(mock_get: MagicMock):
+    service = Service("my/url", number_of_requests=50, max_results=10, body_sample_rate=0.1)
+    service.perform_requests(concurrently=False)
+    assert [i for i, _ in service.results] == list(range(40, 50))
+    assert [i for i, result in service.results if result.body is not None] == [40]
+    assert all(result.body_hash == service.results[0][1].body_hash for _, result in service.results)
+    assert service.histogram.count == 50
+    assert not Service("my/url").results
+
+
+@patch("requests.Session.request", return_value=MagicMock(status_code=200, content=b"{}"))
+def test_service_reuses_session(mock_get: MagicMock):
+    service = Service("my/url")
+    first, second = service._request(), service._request()
+    assert first.cold and not second.cold
+    assert service._get_session() is service._get_session()
+    assert Service("my/url", keep_alive=False)._get_session().headers["Connection"] == "close"
+
+
+@pytest.mark.parametrize("keep_alive, cold_requests", [(True, 1), (False, 5)])
+def test_service_cold_and_warm_times(server_url: str, keep_alive: bool, cold_requests: int):
+    service = Service(server_url, number_of_requests=5, keep_alive=keep_alive)
+    service.perform_requests(concurrently=False)
+    assert service.cold_histogram.count == cold_requests
+    assert service.histogram.count == 5
+    service.show_time(cold_and_warm=True)
+
+
+def test_asyncio_client_request(server_url: str):
+    async def request() -> HttpResponse:
+        async with AsyncioClient() as client:
+            return await client.request("GET", f"{server_url}/items?a=1", params={"b": 2})
+
+    response = asyncio.run(request())
+    assert response.status_code == 200
+    assert json.loads(response.content) == {"path": "/items?a=1&b=2"}
+
+
+def test_get_async_client():
+    assert isinstance(get_async_client("asyncio"), AsyncioClient)
+    with pytest.raises(ValueError):
+        get_async_client("curl")
+
+
+def test_service_perform_requests_async(server_url: str):
+    service = Service(server_url, number_of_requests=20, concurrency=5, client="asyncio")
+    service.perform_requests(concurrently=True, asynchronous=True)
+    assert sorted(i for i, _ in service.results) == list(range(20))
+    assert all(result.status_code == 200 for _, result in service.results)
+    assert service.cold_histogram.count == 5
+
+
+def test_asyncio_client_reuses_connections(server_url: str):
+    async def request(client: AsyncioClient) -> int:
+        async with client:
+            for _ in range(3):
+                await client.request("GET", server_url)
+            return len(client.idle_connections[("127.0.0.1", int(server_url.split(":")[-1]))])
+
+    assert asyncio.run(request(AsyncioClient())) == 1
+    assert asyncio.run(request(AsyncioClient(keep_alive=False))) == 0
+
+
+def test_rate_profile_send_times():
+    assert list(RateProfile(rate=10, duration=0.5).send_times()) == pytest.approx(
+        [0, 0.1, 0.2, 0.3, 0.4]
+    )
+    ramp = list(RateProfile(rate=10, duration=2, final_rate=30).send_times())
+    assert len(ramp) == 40
+    assert all(0 <= second < 2 for second in ramp)
+    assert ramp[1] - ramp[0] > ramp[-1] - ramp[-2]
+    with pytest.raises(ValueError):
+        RateProfile(rate=10, duration=0)
+    with pytest.raises(ValueError):
+        RateProfile(rate=0, duration=1)
 
 
-@patch("bfet.testing.compare_services.CompareServices._diff")
-@patch("bfet.testing.compare_services.CompareServices._request")
-def test_compare_services_compare(
-    _request: MagicMock,
-    _diff: MagicMock,
+def test_service_perform_requests_at_rate(server_url: str):
+    service = Service(server_url, client="asyncio")
+    service.perform_requests_at_rate(RateProfile(rate=100, duration=0.1))
+    assert service.histogram.count == 10
+    assert service.target_rate == 100
+    assert service.achieved_rate is not None and 0 < service.achieved_rate < 200
+    service.perform_requests_at_rate(RateProfile(rate=100, duration=0.1))
+    assert service.histogram.count == 20
+    # Only the requests of the last run count
+    assert service.achieved_rate is not None and 0 < service.achieved_rate < 150
+
+
+@patch("bfet.testing.compare_services.get_async_client", return_value=SlowClient())
+def test_service_at_rate_measures_from_scheduled_time(get_async_client: MagicMock):
+    service = Service("my/url", concurrency=1)
+    service.perform_requests_at_rate(RateProfile(rate=1000, duration=0.01))
+    # The last request had to wait for the other nine, which is part of its execution time
+    assert service.histogram.max > 9 * 20
+    assert service.achieved_rate is not None and service.achieved_rate < 100
+
+
+def summarize(body: bytes, status_code: int = 200) -> ServiceRequest:
+    return _summarize(datetime.now(), 1.0, HttpResponse(status_code, body, {}), False)
+
+
+def test_response_comparator_pairs_by_request_index(
     mock_service_requests: Tuple[ServiceRequest, ServiceRequest],
 ):
     req1, req2 = mock_service_requests
-    _request.return_value = [[(0, req1)], [(0, req2)]]
-    CompareServices([]).compare()
-    _diff.assert_called_once_with(req1.response, req2.response)
+    comparator = ResponseComparator()
+    comparator.add(1, 0, req2)
+    assert 0 in comparator.pending and not comparator.compared
+    comparator.add(0, 0, req1)
+    assert comparator.compared == 1 and not comparator.mismatches and not comparator.pending
+
+
+def test_response_comparator_diffs_mismatches():
+    comparator = ResponseComparator(max_diffs=1)
+    for i, (first, second) in enumerate(
+        [(summarize(b'{"a": 1}'), summarize(b'{"a": 2}')), (summarize(b""), summarize(b"", 500))]
+    ):
+        comparator.add(0, i, first)
+        comparator.add(1, i, second)
+    assert (comparator.body_mismatches, comparator.status_mismatches) == (1, 1)
+    [(i, diff)] = comparator.diffs
+    assert i == 0
+    assert diff["body"]["values_changed"]["root['a']"]["new_value"] == 2
+
+
+def test_compare_services_compare(server_url: str):
+    services = [Service(server_url, name, number_of_requests=10) for name in ("first", "second")]
+    comparator = CompareServices(services, asynchronous=True).compare()
+    assert comparator.compared == 10 and not comparator.mismatches
+    assert all(service.on_result is None for service in services)
+
+
+def test_replay_corpus(server_url: str, tmp_path: Path):
+    corpus = tmp_path / "corpus.jsonl"
+    lines = [{"path": "/items?page=1"}, {"method": "POST", "path": "/items", "body": {"a": 1}}]
+    corpus.write_text("\n".join(json.dumps(line) for line in lines * 5))
+    comparator = replay(server_url, server_url, str(corpus), client="asyncio")
+    assert comparator.compared == 10 and not comparator.mismatches
+    assert comparator.compared_by_endpoint == {"GET /items": 5, "POST /items": 5}
+
+
+def test_service_replays_corpus_in_threads(server_url: str, tmp_path: Path):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text(json.dumps({"method": "POST", "path": "/items", "body": "hi"}) + "\n")
+    service = Service(server_url, number_of_requests=None, corpus=str(corpus), body_sample_rate=1)
+    service.perform_requests(concurrently=True)
+    [(_, result)] = service.results
+    assert result.body is not None
+    assert json.loads(result.body) == {"path": "/items", "body": "hi"}
+    assert list(service.endpoint_histograms) == ["POST /items"]
+
+
+@patch("bfet.testing.compare_services.MAX_ENDPOINTS", 2)
+def test_service_caps_endpoint_histograms():
+    service = Service("my/url")
+    for endpoint in ("GET /a", "GET /b", "GET /c", "GET /d", "GET /a"):
+        service._record(
+            0, _summarize(datetime.now(), 1.0, HttpResponse(200, b"", {}), False, endpoint)
+        )
+    histograms = service.endpoint_histograms
+    assert list(histograms) == ["GET /a", "GET /b", "other endpoints"]
+    assert (histograms["GET /a"].count, histograms["other endpoints"].count) == (2, 2)
+
+
+def test_service_iterates_its_shard():
+    service = Service("my/url", number_of_requests=10)
+    service.shard = (1, 3)
+    assert [i for i, _ in service._iter_requests()] == [1, 4, 7]
+    assert service._expected_requests() == 3
+
+
+@pytest.mark.parametrize("asynchronous", [True, False])
+def test_compare_services_in_processes(server_url: str, asynchronous: bool):
+    services = [Service(server_url, name, number_of_requests=10) for name in ("first", "second")]
+    comparator = CompareServices(services, asynchronous=asynchronous, processes=2).compare()
+    assert comparator.compared == 10 and not comparator.mismatches
+    assert all(service.histogram.count == 10 for service in services)
+    assert all(sorted(i for i, _ in service.results) == list(range(10)) for service in services)
+
+
+def test_compare_services_interleaved_with_warmup():
+    sent = []
+
+    def request(service: Service, request: object) -> ServiceRequest:
+        sent.append(service.name)
+        return summarize(b"{}")
+
+    services = [Service("my/url", name, number_of_requests=20, warmup=2) for name in "ab"]
+    with patch.object(Service, "_request", autospec=True, side_effect=request):
+        comparator = CompareServices(services, concurrently=False, interleaved=True).compare()
+    assert sent[:4] == ["a", "a", "b", "b"]
+    pairs = [sent[i : i + 2] for i in range(4, len(sent), 2)]
+    assert len(pairs) == 20 and all(sorted(pair) == ["a", "b"] for pair in pairs)
+    assert {tuple(pair) for pair in pairs} == {("a", "b"), ("b", "a")}
+    assert comparator.compared == 20
+    assert all(service.histogram.count == 20 for service in services)
+    assert all([i for i, _ in service.results] == list(range(20)) for service in services)
+
+
+@pytest.mark.parametrize("asynchronous", [True, False])
+def test_compare_services_interleaved_concurrently(server_url: str, asynchronous: bool):
+    services = [Service(server_url, name, number_of_requests=10, warmup=3) for name in "ab"]
+    comparator = CompareServices(
+        services, asynchronous=asynchronous, interleaved=True, factory=DataFactory(seed=1)
+    ).compare()
+    assert comparator.compared == 10 and not comparator.mismatches
+    assert all(service.histogram.count == 10 for service in services)
+    with pytest.raises(ValueError):
+        CompareServices(services, rate=RateProfile(10, 1), interleaved=True)
+
+
+def test_main_writes_the_regression_report(server_url: str, tmp_path: Path):
+    report = tmp_path / "report.json"
+    thresholds = ["--threshold", "50=100", "--threshold", "99=100"]
+    exit_code = main([server_url, server_url, "-n", "20", "--report", str(report), *thresholds])
+    data = json.loads(report.read_text())
+    assert exit_code == 0 and data["regression"] is False
+    assert data["compared"] == 20 and data["mismatches"] == 0
+    assert [delta["percentile"] for delta in data["percentiles"]] == [50, 99]
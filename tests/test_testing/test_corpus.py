@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from bfet.testing.corpus import CorpusRequest, read_corpus
+
+HAR_ENTRY = {
+    "request": {
+        "method": "post",
+        "url": "https://example.com/items?page=2",
+        "headers": [
+            {"name": "Host", "value": "example.com"},
+            {"name": ":authority", "value": "example.com"},
+            {"name": "Accept", "value": "application/json"},
+        ],
+        "postData": {"text": '{"name": "item"}'},
+    }
+}
+
+
+def test_read_corpus_jsonl(tmp_path: Path):
+    filename = tmp_path / "corpus.jsonl"
+    lines = [{"path": "/items", "params": {"page": 1}}, {"method": "put", "body": {"a": 1}}]
+    filename.write_text("\n".join(json.dumps(line) for line in lines + [HAR_ENTRY]) + "\n\n")
+    first, second, third = read_corpus(str(filename))
+    assert first == CorpusRequest(path="/items", params={"page": 1})
+    assert (second.method, second.body, second.endpoint) == ("PUT", b'{"a": 1}', "PUT /")
+    assert third.path == "/items?page=2" and third.endpoint == "POST /items"
+    assert third.headers == {"Accept": "application/json"}
+
+
+def test_read_corpus_har(tmp_path: Path):
+    filename = tmp_path / "corpus.har"
+    filename.write_text(json.dumps({"log": {"entries": [HAR_ENTRY, HAR_ENTRY]}}))
+    assert [request.body for request in read_corpus(str(filename))] == [b'{"name": "item"}'] * 2
+
+
+def test_corpus_request_endpoint_replaces_ids():
+    paths = ["/users/123?page=1", "/users/124", "/users/0b5d6a8e-2c3f-4e1a-9f7b-1a2b3c4d5e6f"]
+    assert {CorpusRequest(path=path).endpoint for path in paths} == {"GET /users/{id}"}
+    assert CorpusRequest(path="/users/v2/me").endpoint == "GET /users/v2/me"
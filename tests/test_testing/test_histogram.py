@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from bfet.testing.histogram import LatencyHistogram
+
+
+def test_histogram_percentiles():
+    values = np.random.default_rng(1).lognormal(3, 1, 10000)
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    expected = np.percentile(values, [50, 90, 99, 99.9], method="inverted_cdf")
+    assert list(histogram.percentiles().values()) == pytest.approx(expected, rel=1e-3)
+    assert histogram.max == values.max() and histogram.min == values.min()
+    assert histogram.mean == pytest.approx(values.mean())
+    assert histogram.stdev == pytest.approx(values.std(ddof=1))
+
+
+def test_histogram_with_few_values():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(99) == 0.0 and histogram.stdev == 0.0
+    histogram.record(12.5)
+    assert histogram.stdev == 0.0
+    assert histogram.percentile(50) == histogram.max == 12.5
+
+
+def test_histogram_merge_and_json():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for value in range(1, 101):
+        (first if value % 2 else second).record(value)
+    merged = LatencyHistogram.from_json(first.to_json()).merge(second)
+    assert merged.count == 100
+    assert merged.percentile(50) == pytest.approx(50, rel=1e-3)
+    assert (merged.min, merged.max) == (1, 100)
+    with pytest.raises(ValueError):
+        merged.merge(LatencyHistogram(significant_digits=2))
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from bfet.testing.histogram import LatencyHistogram
+from bfet.testing.regression import check_regression, mann_whitney
+
+
+def histogram_of(values: np.ndarray) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+@pytest.fixture
+def current() -> LatencyHistogram:
+    return histogram_of(np.random.default_rng(1).lognormal(3, 0.5, 2000))
+
+
+def test_no_regression_for_the_same_distribution(current: LatencyHistogram):
+    new = histogram_of(np.random.default_rng(2).lognormal(3, 0.5, 2000))
+    report = check_regression(current, new, resamples=200, seed=1)
+    assert not report.regression and report.exit_code() == 0
+    assert report.p_value > 0.01
+    assert all(delta.low < delta.delta < delta.high for delta in report.deltas)
+
+
+def test_regression_for_a_slower_distribution(current: LatencyHistogram):
+    new = histogram_of(np.random.default_rng(2).lognormal(3, 0.5, 2000) * 1.5)
+    report = check_regression(current, new, {50: 0.1, 99: 2}, resamples=200, seed=1)
+    p50, p99 = report.deltas
+    assert p50.regression and not p99.regression
+    assert p50.delta == pytest.approx(0.5, abs=0.1)
+    assert report.regression and report.exit_code() == 1
+    assert report.p_value < 1e-6
+
+
+def test_regression_report_to_json_and_exit_code(current: LatencyHistogram):
+    report = check_regression(current, current, resamples=10, compared=10, mismatches=2)
+    data = json.loads(report.to_json())
+    assert data["regression"] is False and data["mismatches"] == 2
+    assert [delta["percentile"] for delta in data["percentiles"]] == [50, 90, 99]
+    assert report.exit_code() == 0 and report.exit_code(fail_on_mismatch=True) == 1
+    with pytest.raises(ValueError):
+        check_regression(current, LatencyHistogram())
+
+
+def test_mann_whitney(current: LatencyHistogram):
+    faster = histogram_of(np.random.default_rng(2).lognormal(3, 0.5, 2000) * 0.8)
+    assert mann_whitney(current, current) == pytest.approx(0.5, abs=0.05)
+    assert mann_whitney(faster, current) < 1e-6
+    assert mann_whitney(current, faster) > 1 - 1e-6